@@ -0,0 +1,104 @@
+from posts.models import Comment, Follow, Group, Post
+from posts.storage import image_storage
+
+
+def image_url(name):
+    return image_storage.url(name) if name else None
+
+
+class Resource:
+    """Как отдавать модель в API строками values(), без экземпляров.
+
+    fields — {имя в JSON: путь ORM}, ordering — ключ курсора по полям
+    самой модели с id последним, filters — {параметр запроса: путь ORM},
+    transforms — {имя в JSON: функция над значением из базы}.
+    """
+
+    def __init__(self, model, fields, ordering, filters=None,
+                 transforms=None):
+        self.model = model
+        self.fields = fields
+        self.ordering = ordering
+        self.filters = filters or {}
+        self.transforms = transforms or {}
+
+    def lookup_field(self, path):
+        """Поле модели, на которое указывает путь ORM."""
+        opts = self.model._meta
+        for part in path.split('__'):
+            field = opts.get_field(part)
+            if field.is_relation:
+                opts = field.related_model._meta
+        return field
+
+    def key_fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def rows(self, names, **lookups):
+        """Queryset словарей с полями names и ключом курсора."""
+        paths = {self.fields[name] for name in names}
+        paths.update(self.key_fields())
+        return self.model.objects.filter(**lookups).values(*paths)
+
+    def serialize(self, row, names):
+        item = {}
+        for name in names:
+            value = row[self.fields[name]]
+            transform = self.transforms.get(name)
+            item[name] = transform(value) if transform else value
+        return item
+
+
+POSTS = Resource(
+    Post,
+    fields={
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'stats__comments_count',
+    },
+    ordering=('-pub_date', '-id'),
+    filters={'author': 'author__username', 'group': 'group__slug'},
+    transforms={
+        'image': image_url,
+        'comments_count': lambda count: count or 0,
+    },
+)
+
+COMMENTS = Resource(
+    Comment,
+    fields={
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    ordering=('created', 'id'),
+    filters={'post': 'post_id', 'author': 'author__username'},
+)
+
+GROUPS = Resource(
+    Group,
+    fields={
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    },
+    ordering=('id',),
+)
+
+FOLLOWS = Resource(
+    Follow,
+    fields={
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+    ordering=('id',),
+    filters={'author': 'author__username'},
+)
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from itertools import count
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import QueryBudgetMixin
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание'
+        )
+        now = timezone.now()
+        cls.posts = []
+        for number in range(5):
+            post = Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=number)
+            )
+            cls.posts.append(post)
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(f'api:{name}', args=args), params)
+        return response.status_code, response.json()
+
+    def test_post_list_pages(self):
+        """Лента листается курсором от новых постов к старым."""
+        status, first = self.get('post_list', limit=2)
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [post['text'] for post in first['results']], ['Пост 0', 'Пост 1']
+        )
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [post['text'] for post in second['results']], ['Пост 2', 'Пост 3']
+        )
+        self.assertIn('limit=2', second['previous'])
+
+    def test_post_fields(self):
+        """Пост отдаётся со связанными данными, ?fields= их сужает."""
+        _, post = self.get('post_detail', self.posts[1].pk)
+        self.assertEqual(post['author'], 'writer')
+        self.assertEqual(post['group'], 'api-group')
+        self.assertIsNone(post['image'])
+        self.assertEqual(post['comments_count'], 0)
+        _, page = self.get('post_list', fields='id,text', limit=1)
+        self.assertEqual(
+            page['results'], [{'id': self.posts[0].pk, 'text': 'Пост 0'}]
+        )
+
+    def test_filters(self):
+        """Фильтры по группе, посту и подписчику."""
+        _, page = self.get('post_list', group='api-group')
+        self.assertEqual(
+            [post['id'] for post in page['results']],
+            [self.posts[1].pk, self.posts[3].pk],
+        )
+        _, comments = self.get('post_comments', self.posts[0].pk)
+        self.assertEqual(
+            comments['results'][0]['text'], 'Комментарий'
+        )
+        self.client.force_login(self.reader)
+        _, follows = self.get('follow_list', author='writer')
+        self.assertEqual(
+            follows['results'],
+            [{'id': follows['results'][0]['id'], 'user': 'reader',
+              'author': 'writer'}],
+        )
+
+    def test_follows_private(self):
+        """Подписки видит только их владелец, гостю — 401."""
+        status, body = self.get('follow_list')
+        self.assertEqual(status, 401)
+        self.assertIn('error', body)
+        self.client.force_login(self.author)
+        _, follows = self.get('follow_list')
+        self.assertEqual(follows['results'], [])
+
+    def test_url_lookup_not_overridden(self):
+        """Параметр запроса не подменяет пост из адреса."""
+        _, comments = self.get(
+            'post_comments', self.posts[1].pk, post=self.posts[0].pk
+        )
+        self.assertEqual(comments['results'], [])
+
+    def test_ids(self):
+        """?ids= отдаёт посты в заданном порядке, пропуская ненайденные."""
+        ids = [self.posts[3].pk, 0, self.posts[1].pk]
+        _, batch = self.get(
+            'post_list', ids=','.join(map(str, ids)), fields='id'
+        )
+        self.assertEqual(
+            batch['results'],
+            [{'id': self.posts[3].pk}, {'id': self.posts[1].pk}],
+        )
+
+    def test_errors(self):
+        """Ошибки запроса возвращаются JSON с кодом 400 или 404."""
+        cases = (
+            ('post_list', (), {'fields': 'id,password'}, 400),
+            ('post_list', (), {'ids': 'a,b'}, 400),
+            ('comment_list', (), {'post': 'abc'}, 400),
+            ('post_detail', (0,), {}, 404),
+        )
+        for name, args, params, expected in cases:
+            with self.subTest(name=name, params=params):
+                status, body = self.get(name, *args, **params)
+                self.assertEqual(status, expected)
+                self.assertIn('error', body)
+        _, body = self.get('comment_list', post='abc')
+        self.assertNotIn('invalid literal', body['error'])
+
+    def test_query_budgets(self):
+        """Каждый эндпоинт — один запрос, сколько бы ни было строк; подпискам
+        ещё нужны сессия и пользователь."""
+        stars = count()
+
+        def grow():
+            for _ in range(5):
+                Post.objects.create(
+                    text='Ещё', author=self.reader, group=self.group
+                )
+                Comment.objects.create(
+                    post=self.posts[0], author=self.author, text='Ещё'
+                )
+                Follow.objects.create(
+                    user=self.reader,
+                    author=User.objects.create_user(
+                        username=f'star{next(stars)}'
+                    ),
+                )
+
+        ids = ','.join(str(post.pk) for post in self.posts)
+        self.query_budgets = {
+            reverse('api:post_list'): 1,
+            f'{reverse("api:post_list")}?ids={ids}': 1,
+            f'{reverse("api:post_list")}?group=api-group': 1,
+            reverse('api:post_detail', args=[self.posts[0].pk]): 1,
+            reverse('api:post_comments', args=[self.posts[0].pk]): 1,
+            reverse('api:comment_list'): 1,
+            reverse('api:comment_detail', args=[self.comment.pk]): 1,
+            reverse('api:group_list'): 1,
+            reverse('api:group_detail', args=[self.group.pk]): 1,
+            reverse('api:follow_list'): 3,
+        }
+        self.client.force_login(self.reader)
+        self.check_query_budgets(self.client, grow)
@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from posts.utils import CURSOR_PARAM, CursorPaginator
+
+from .resources import COMMENTS, FOLLOWS, GROUPS, POSTS
+
+FIELDS_PARAM = 'fields'
+IDS_PARAM = 'ids'
+LIMIT_PARAM = 'limit'
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def requested_fields(request, resource):
+    """Поля из ?fields=a,b; без параметра — все поля ресурса."""
+    raw = request.GET.get(FIELDS_PARAM)
+    if not raw:
+        return list(resource.fields)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',')))
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def requested_ids(request):
+    try:
+        ids = [int(pk) for pk in request.GET[IDS_PARAM].split(',') if pk]
+    except ValueError:
+        raise BadRequest('ids — список чисел через запятую')
+    if len(ids) > settings.API_MAX_IDS:
+        raise BadRequest(f'Не больше {settings.API_MAX_IDS} ids за запрос')
+    return list(dict.fromkeys(ids))
+
+
+def requested_limit(request):
+    try:
+        limit = int(request.GET.get(LIMIT_PARAM, settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit — число')
+    return min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def requested_filters(request, resource, fixed):
+    """Фильтры из параметров запроса, проверенные по полям модели.
+
+    Условия, заданные адресом (fixed), параметры не переопределяют.
+    """
+    lookups = {}
+    for param, path in resource.filters.items():
+        if param not in request.GET or path in fixed:
+            continue
+        try:
+            lookups[path] = resource.lookup_field(path).to_python(
+                request.GET[param]
+            )
+        except ValidationError:
+            raise BadRequest(f'Недопустимое значение {param}')
+    return lookups
+
+
+def cursor_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def listing(request, resource, **lookups):
+    """Страница ресурса по курсору или пакет по ?ids=.
+
+    Фильтры из resource.filters берутся из параметров запроса. Пакет
+    отдаётся в порядке ids, ненайденные id пропускаются.
+    """
+    try:
+        names = requested_fields(request, resource)
+        lookups.update(requested_filters(request, resource, lookups))
+        if IDS_PARAM in request.GET:
+            ids = requested_ids(request)
+            rows = {
+                row['id']: row
+                for row in resource.rows(names, id__in=ids, **lookups)
+            }
+            return JsonResponse({'results': [
+                resource.serialize(rows[pk], names)
+                for pk in ids if pk in rows
+            ]})
+        paginator = CursorPaginator(
+            resource.rows(names, **lookups).order_by(*resource.ordering),
+            requested_limit(request),
+            resource.ordering,
+        )
+        page = paginator.get_page(request.GET.get(CURSOR_PARAM))
+    except BadRequest as exception:
+        return error(str(exception))
+    return JsonResponse({
+        'results': [resource.serialize(row, names) for row in page],
+        'next': cursor_link(request, paginator.next_cursor),
+        'previous': cursor_link(request, paginator.previous_cursor),
+    })
+
+
+def detail(request, resource, pk):
+    try:
+        names = requested_fields(request, resource)
+    except BadRequest as exception:
+        return error(str(exception))
+    row = resource.rows(names, id=pk).first()
+    if row is None:
+        return error('Не найдено', status=404)
+    return JsonResponse(resource.serialize(row, names))
+
+
+@require_safe
+def post_list(request):
+    return listing(request, POSTS)
+
+
+@require_safe
+def post_detail(request, pk):
+    return detail(request, POSTS, pk)
+
+
+@require_safe
+def post_comments(request, post_id):
+    return listing(request, COMMENTS, post_id=post_id)
+
+
+@require_safe
+def comment_list(request):
+    return listing(request, COMMENTS)
+
+
+@require_safe
+def comment_detail(request, pk):
+    return detail(request, COMMENTS, pk)
+
+
+@require_safe
+def group_list(request):
+    return listing(request, GROUPS)
+
+
+@require_safe
+def group_detail(request, pk):
+    return detail(request, GROUPS, pk)
+
+
+@require_safe
+def follow_list(request):
+    """Подписки текущего пользователя: граф подписок целиком, как и на
+    сайте, не раскрывается."""
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация', status=401)
+    return listing(request, FOLLOWS, user=request.user)
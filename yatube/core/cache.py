@@ -0,0 +1,292 @@
+"Двухуровневый кэш: LRU в памяти процесса поверх общего SQLite-файла."
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS entries ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE TABLE IF NOT EXISTS invalidations ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)',
+)
+NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+MAX_PARAMS = 500
+
+
+class TieredCache(BaseCache):
+    """Кэш для нескольких воркеров на одной машине.
+
+    L2 — SQLite-файл из LOCATION, общий для всех процессов хоста. L1 —
+    ограниченный LRU внутри процесса. Каждая запись в L2 добавляет
+    строку в журнал инвалидаций, и процессы не реже раза в
+    SYNC_INTERVAL секунд выбрасывают из своего L1 изменённые другими
+    ключи. Дольше L1_TIMEOUT копия в L1 не живёт.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 0.1))
+        self._log_size = int(options.get('INVALIDATION_LOG_SIZE', 10000))
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_seen = None
+        self._own_writes = set()
+        self._next_sync = 0
+        self._writes = 0
+
+    @property
+    def _db(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+            if self._last_seen is None:
+                self._last_seen, = connection.execute(
+                    'SELECT COALESCE(MAX(id), 0) FROM invalidations'
+                ).fetchone()
+        return self._local.connection
+
+    def _write(self, statements):
+        """Выполняет запросы одной транзакцией и пишет в журнал."""
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(db)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+        return result
+
+    def _log(self, db, key):
+        logged = db.execute(
+            'INSERT INTO invalidations (key) VALUES (?)', (key,)
+        )
+        self._own_writes.add(logged.lastrowid)
+
+    def _prune(self):
+        db = self._db
+        db.execute('DELETE FROM entries WHERE expires <= ?', (time.time(),))
+        db.execute(
+            'DELETE FROM invalidations WHERE id <= '
+            '(SELECT MAX(id) FROM invalidations) - ?',
+            (self._log_size,),
+        )
+        count, = db.execute('SELECT COUNT(*) FROM entries').fetchone()
+        if count > self._max_entries:
+            # Вечные ключи — поколения, классы авторов, метрики — уходят
+            # последними: их потеря сбрасывает целые пространства имён.
+            db.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def _sync(self):
+        """Выбрасывает из L1 ключи, изменённые другими процессами."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        self._next_sync = now + self._sync_interval
+        rows = self._db.execute(
+            'SELECT id, key FROM invalidations WHERE id > ? ORDER BY id',
+            (self._last_seen,),
+        ).fetchall()
+        if not rows:
+            return
+        with self._lock:
+            for logged_id, key in rows:
+                if logged_id in self._own_writes:
+                    self._own_writes.discard(logged_id)
+                elif key is None:
+                    self._l1.clear()
+                else:
+                    self._l1.pop(key, None)
+        self._last_seen = rows[-1][0]
+
+    def _remember(self, key, pickled, expires):
+        l1_expires = time.time() + self._l1_timeout
+        if expires is not None:
+            l1_expires = min(l1_expires, expires)
+        with self._lock:
+            self._l1[key] = (pickled, l1_expires)
+            self._l1.move_to_end(key, last=False)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem()
+
+    def _forget(self, key):
+        with self._lock:
+            self._l1.pop(key, None)
+
+    def _from_l1(self, key):
+        with self._lock:
+            found = self._l1.get(key)
+            if found is None:
+                return None
+            if found[1] <= time.time():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key, last=False)
+            return found[0]
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        found = self._get_many_raw([key])
+        if key not in found:
+            return default
+        return pickle.loads(found[key])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        found = self._get_many_raw(list(keys))
+        return {keys[key]: pickle.loads(value) for key, value in found.items()}
+
+    def _get_many_raw(self, keys):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self._from_l1(key)
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickled
+        for start in range(0, len(missing), MAX_PARAMS):
+            chunk = missing[start:start + MAX_PARAMS]
+            rows = self._db.execute(
+                'SELECT key, value, expires FROM entries WHERE key IN '
+                f'({", ".join("?" * len(chunk))}) AND {NOT_EXPIRED}',
+                chunk + [time.time()],
+            ).fetchall()
+            for key, pickled, expires in rows:
+                self._remember(key, pickled, expires)
+                found[key] = pickled
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        expires = self.get_backend_timeout(timeout)
+
+        def statements(db):
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?)',
+                (key, pickled, expires),
+            )
+            self._log(db, key)
+        self._write(statements)
+        self._remember(key, pickled, expires)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        expires = self.get_backend_timeout(timeout)
+
+        def statements(db):
+            exists = db.execute(
+                f'SELECT 1 FROM entries WHERE key = ? AND {NOT_EXPIRED}',
+                (key, time.time()),
+            ).fetchone()
+            if exists:
+                return False
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?)',
+                (key, pickled, expires),
+            )
+            self._log(db, key)
+            return True
+        added = self._write(statements)
+        if added:
+            self._remember(key, pickled, expires)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+
+        def statements(db):
+            touched = db.execute(
+                f'UPDATE entries SET expires = ? WHERE key = ? '
+                f'AND {NOT_EXPIRED}',
+                (expires, key, time.time()),
+            ).rowcount
+            if touched:
+                self._log(db, key)
+            return bool(touched)
+        self._forget(key)
+        return self._write(statements)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+
+        def statements(db):
+            row = db.execute(
+                f'SELECT value, expires FROM entries WHERE key = ? '
+                f'AND {NOT_EXPIRED}',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, self.pickle_protocol)
+            db.execute(
+                'UPDATE entries SET value = ? WHERE key = ?', (pickled, key)
+            )
+            self._log(db, key)
+            return value, pickled, row[1]
+        value, pickled, expires = self._write(statements)
+        self._remember(key, pickled, expires)
+        return value
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+
+        def statements(db):
+            deleted = db.execute(
+                'DELETE FROM entries WHERE key = ?', (key,)
+            ).rowcount
+            self._log(db, key)
+            return bool(deleted)
+        self._forget(key)
+        return self._write(statements)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return key in self._get_many_raw([key])
+
+    def clear(self):
+        def statements(db):
+            db.execute('DELETE FROM entries')
+            self._log(db, None)
+        self._write(statements)
+        with self._lock:
+            self._l1.clear()
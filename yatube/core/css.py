@@ -0,0 +1,136 @@
+import os
+import re
+
+CLASS_ATTRIBUTE = re.compile(r'\bclass\s*=\s*(["\'])(.*?)\1', re.S)
+ID_ATTRIBUTE = re.compile(r'\bid\s*=\s*(["\'])(.*?)\1', re.S)
+ADDCLASS = re.compile(r'\|\s*addclass\s*:\s*(["\'])(.*?)\1')
+TEMPLATE_SYNTAX = re.compile(r'{%.*?%}|{{.*?}}', re.S)
+SELECTOR_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+SELECTOR_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+GROUPING_RULES = ('@media', '@supports')
+
+
+def template_names(directories):
+    """Классы и id, которые встречаются в шаблонах каталогов."""
+    classes, ids = set(), set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith(('.html', '.txt')):
+                    continue
+                with open(os.path.join(root, filename), encoding='utf-8') as f:
+                    source = f.read()
+                for pattern, found in (
+                    (CLASS_ATTRIBUTE, classes),
+                    (ADDCLASS, classes),
+                    (ID_ATTRIBUTE, ids),
+                ):
+                    for match in pattern.finditer(source):
+                        value = TEMPLATE_SYNTAX.sub(' ', match.group(2))
+                        found.update(value.split())
+    return classes, ids
+
+
+def blocks(css):
+    """Разбивает CSS верхнего уровня на (заголовок, тело или None).
+
+    Тело None у правил, которые заканчиваются точкой с запятой
+    (@charset, @import). Комментарии, кроме /*! лицензии */,
+    выбрасываются.
+    """
+    position, prelude = 0, []
+    while position < len(css):
+        char = css[position]
+        if css.startswith('/*', position):
+            end = css.find('*/', position + 2)
+            end = len(css) if end == -1 else end + 2
+            if css.startswith('/*!', position):
+                yield css[position:end], None
+            position = end
+        elif char in '"\'':
+            end = css.find(char, position + 1)
+            end = len(css) if end == -1 else end + 1
+            prelude.append(css[position:end])
+            position = end
+        elif char == ';':
+            yield ''.join(prelude).strip() + ';', None
+            position, prelude = position + 1, []
+        elif char == '{':
+            end = block_end(css, position)
+            yield ''.join(prelude).strip(), css[position + 1:end]
+            position, prelude = end + 1, []
+        else:
+            prelude.append(char)
+            position += 1
+
+
+def block_end(css, start):
+    """Позиция закрывающей скобки блока, открытого в start."""
+    depth, position = 0, start
+    while position < len(css):
+        char = css[position]
+        if char in '"\'':
+            end = css.find(char, position + 1)
+            position = len(css) if end == -1 else end + 1
+            continue
+        if css.startswith('/*', position):
+            end = css.find('*/', position + 2)
+            position = len(css) if end == -1 else end + 2
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return position
+        position += 1
+    return len(css)
+
+
+def selectors(prelude):
+    """Селекторы списка через запятую, не разрывая :not(.a, .b)."""
+    depth, start = 0, 0
+    for position, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            yield prelude[start:position].strip()
+            start = position + 1
+    yield prelude[start:].strip()
+
+
+def used_selector(selector, classes, ids):
+    return (
+        set(SELECTOR_CLASS.findall(selector)) <= classes
+        and set(SELECTOR_ID.findall(selector)) <= ids
+    )
+
+
+def subset(css, classes, ids):
+    """Оставляет из CSS только селекторы с используемыми классами и id.
+
+    Селектор нужен, если все его классы и id есть в шаблонах; элементы
+    и атрибуты не проверяются. Правила @media и @supports сокращаются
+    рекурсивно, прочие @-правила (@font-face, @keyframes) и :root
+    остаются как есть.
+    """
+    kept = []
+    for prelude, body in blocks(css):
+        if body is None:
+            kept.append(prelude)
+        elif prelude.startswith(GROUPING_RULES):
+            inner = subset(body, classes, ids)
+            if inner:
+                kept.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            kept.append(f'{prelude}{{{body}}}')
+        else:
+            used = [
+                selector for selector in selectors(prelude)
+                if used_selector(selector, classes, ids)
+            ]
+            if used:
+                kept.append(f'{",".join(used)}{{{body}}}')
+    return ''.join(kept)
@@ -0,0 +1,152 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Читает из файла только байты [start, start + length).
+
+    fileno() отдаёт дескриптор файла, уже сдвинутый на start, поэтому
+    wsgi.file_wrapper сервера (например, gunicorn) отправляет кусок через
+    sendfile, ограничив его Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    """(начало, длина) из заголовка Range или None, если отдавать файл
+    целиком. Несколько диапазонов не поддерживаются: тогда тоже None.
+
+    Неудовлетворимый диапазон поднимает ValueError.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def max_age(path):
+    """Миниатюры и картинки, названные по содержимому, не меняются."""
+    if any(re.search(pattern, path)
+           for pattern in settings.MEDIA_IMMUTABLE_PATTERNS):
+        return settings.MEDIA_IMMUTABLE_MAX_AGE, True
+    return settings.MEDIA_MAX_AGE, False
+
+
+@require_safe
+def serve(request, path):
+    """Отдаёт файл из MEDIA_ROOT.
+
+    Поддерживает If-Modified-Since и один диапазон Range. Если задан
+    MEDIA_ACCEL_REDIRECT, сам файл отдаёт nginx по X-Accel-Redirect.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    last_modified = http_date(stat.st_mtime)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse()
+        # Заголовок с не-ASCII Django кодирует по RFC 2047, а nginx
+        # понимает только процентное кодирование.
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT + quote(path.lstrip('/'))
+        )
+        response['Content-Type'] = content_type(full_path)
+    else:
+        response = file_response(request, full_path, stat)
+    if response.status_code == 416:
+        return response
+    response['Last-Modified'] = last_modified
+    seconds, immutable = max_age(path)
+    patch_cache_control(response, public=True, max_age=seconds)
+    if immutable:
+        patch_cache_control(response, immutable=True)
+    return response
+
+
+def content_type(full_path):
+    guessed, encoding = mimetypes.guess_type(full_path)
+    if encoding:
+        return 'application/octet-stream'
+    return guessed or 'application/octet-stream'
+
+
+def file_response(request, full_path, stat):
+    header = request.META.get('HTTP_RANGE', '')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and parse_http_date_safe(if_range) != int(stat.st_mtime):
+        header = ''
+    try:
+        requested = byte_range(header, stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    file = open(full_path, 'rb')
+    if requested is None:
+        response = FileResponse(file, content_type=content_type(full_path))
+    else:
+        start, length = requested
+        response = FileResponse(
+            FileRange(file, start, length),
+            status=206,
+            content_type=content_type(full_path),
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}'
+        )
+    response['Accept-Ranges'] = 'bytes'
+    return response
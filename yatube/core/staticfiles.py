@@ -0,0 +1,164 @@
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from . import css
+from .media import content_type
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+ACCEPT_ENCODING = re.compile(r'([\w*-]+)\s*(?:;\s*q=([\d.]+))?')
+
+
+def compress(content, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(content, compresslevel=9, mtime=0)
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Хэширует имена файлов в collectstatic и кладёт рядом .gz и .br.
+
+    Файлы из STATIC_CSS_SUBSET перед хэшированием сокращаются до
+    селекторов, которые есть в шаблонах. Пока манифеста нет (статика не
+    собрана), {% static %} отдаёт исходные имена.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.subset_css(paths)
+        collected = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            yield name, hashed_name, processed
+            if hashed_name and not dry_run:
+                collected.update((name, hashed_name))
+        for name in sorted(collected):
+            yield from self.compress(name)
+
+    def subset_css(self, paths):
+        names = [name for name in settings.STATIC_CSS_SUBSET if name in paths]
+        if not names:
+            return
+        directories = settings.TEMPLATES[0]['DIRS']
+        classes, ids = css.template_names(directories)
+        for name in names:
+            with self.open(name) as original:
+                source = original.read().decode()
+            self.delete(name)
+            self._save(name, ContentFile(
+                css.subset(source, classes, ids).encode()
+            ))
+            paths[name] = (self, name)
+
+    def compress(self, name):
+        """Сжатые копии файла; те, что не меньше исходника, не пишутся."""
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        for encoding, suffix in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            packed = compress(content, encoding)
+            if len(packed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(packed))
+            yield name, name + suffix, True
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def is_hashed(self, name):
+        return name in self.hashed_files.values()
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for encoding, quality in ACCEPT_ENCODING.findall(header):
+        try:
+            if float(quality or 1) > 0:
+                accepted.add(encoding.lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+@require_safe
+def serve(request, path):
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Если клиент принимает br или gzip и рядом лежит сжатая копия, она
+    отдаётся с Content-Encoding; на лету ничего не сжимается. Файлы с
+    хэшем в имени кэшируются навсегда.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    accepted = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    served, encoding = full_path, None
+    for candidate, suffix in ENCODINGS:
+        if candidate in accepted and os.path.isfile(full_path + suffix):
+            served, encoding = full_path + suffix, candidate
+            break
+    stat = os.stat(served)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(served, 'rb'), content_type=content_type(full_path)
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    storage = staticfiles_storage
+    if isinstance(storage, CompressedManifestStorage) and storage.is_hashed(
+        path
+    ):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.STATIC_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_MAX_AGE
+        )
+    return response
@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Бюджеты SQL-запросов для страниц в тестах.
+
+    query_budgets — словарь {url: максимум запросов}. Страница проверяется
+    дважды: до и после того, как тест добавит объекты, и число запросов
+    не должно расти вместе с числом объектов — так ловится N+1.
+    """
+    query_budgets = {}
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        return queries
+
+    def assertQueryBudget(self, client, url, budget):
+        queries = self.count_queries(client, url)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f'{url}: {len(queries)} запросов при бюджете {budget}:\n'
+            + '\n'.join(query['sql'] for query in queries),
+        )
+        return len(queries)
+
+    def assertQueriesDoNotGrow(self, client, url, grow):
+        before = len(self.count_queries(client, url))
+        grow()
+        queries = self.count_queries(client, url)
+        self.assertEqual(
+            len(queries),
+            before,
+            f'{url}: число запросов выросло с {before} до {len(queries)}:\n'
+            + '\n'.join(query['sql'] for query in queries),
+        )
+
+    def check_query_budgets(self, client, grow):
+        for url, budget in self.query_budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(client, url, budget)
+                self.assertQueriesDoNotGrow(client, url, grow)
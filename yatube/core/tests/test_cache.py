@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache import TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.first = self.worker()
+        self.second = self.worker()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def worker(self, sync_interval=0, **options):
+        """Отдельный экземпляр бэкенда — как кэш другого воркера."""
+        return TieredCache(
+            f'{self.directory}/cache.sqlite3',
+            {'OPTIONS': {'SYNC_INTERVAL': sync_interval, **options}},
+        )
+
+    def test_shared_between_workers(self):
+        """Запись одного воркера видна другому."""
+        self.first.set('key', {'value': 1})
+        self.assertEqual(self.second.get('key'), {'value': 1})
+        self.assertEqual(self.second.get_many(['key', 'missing']), {
+            'key': {'value': 1},
+        })
+
+    def test_invalidation_reaches_other_l1(self):
+        """Изменение в одном воркере выбрасывает ключ из L1 другого."""
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'new')
+
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+
+    def test_l1_serves_without_sync(self):
+        """Между синхронизациями чтение идёт из L1 процесса."""
+        lazy = self.worker(sync_interval=60)
+        self.first.set('key', 'old')
+        self.assertEqual(lazy.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.assertEqual(lazy.get('key'), 'old')
+
+    def test_add_incr_and_clear(self):
+        """add, incr и clear работают поверх общего хранилища."""
+        self.assertTrue(self.first.add('lock', 1))
+        self.assertFalse(self.second.add('lock', 2))
+        self.assertEqual(self.second.incr('lock'), 2)
+        self.assertEqual(self.first.get('lock'), 2)
+        with self.assertRaises(ValueError):
+            self.first.incr('missing')
+
+        self.second.clear()
+        self.assertIsNone(self.first.get('lock'))
+
+    def test_expiry(self):
+        """Истёкшие ключи не возвращаются ни из L1, ни из L2."""
+        self.first.set('key', 'value', timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.first.get('key'))
+        self.assertIsNone(self.second.get('key'))
+
+    def test_cull_keeps_permanent_keys(self):
+        """При переполнении первыми удаляются ключи со сроком жизни."""
+        small = self.worker(MAX_ENTRIES=50)
+        small.set('generation', 1, timeout=None)
+        for number in range(120):
+            small.set(f'page:{number}', 'x' * 100, timeout=60)
+        self.assertEqual(self.second.get('generation'), 1)
+        self.assertIsNone(self.second.get('page:0'))
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT=None)
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        for name in ('posts/photo.jpg', 'cache/ab/cd/thumb.jpg'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', **headers)
+
+    def test_whole_file(self):
+        """Файл отдаётся целиком, с Content-Length и Accept-Ranges."""
+        response = self.get('posts/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_ranges(self):
+        """Один диапазон отдаётся ответом 206 с Content-Range."""
+        cases = (
+            ('bytes=0-9', CONTENT[:10], 'bytes 0-9/1024'),
+            ('bytes=1000-', CONTENT[1000:], 'bytes 1000-1023/1024'),
+            ('bytes=-4', CONTENT[-4:], 'bytes 1020-1023/1024'),
+            ('bytes=1020-5000', CONTENT[1020:], 'bytes 1020-1023/1024'),
+        )
+        for header, body, content_range in cases:
+            with self.subTest(header=header):
+                response = self.get('posts/photo.jpg', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+                self.assertEqual(response['Content-Range'], content_range)
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла — ответ 416."""
+        response = self.get('posts/photo.jpg', HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_stale_if_range_sends_whole_file(self):
+        """Range с устаревшим If-Range игнорируется."""
+        response = self.get(
+            'posts/photo.jpg',
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE=http_date(0),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_headers(self):
+        """Миниатюры кэшируются навсегда, прочие файлы — на час."""
+        thumbnail = self.get('cache/ab/cd/thumb.jpg')
+        self.assertIn('immutable', thumbnail['Cache-Control'])
+        self.assertIn('max-age=31536000', thumbnail['Cache-Control'])
+        photo = self.get('posts/photo.jpg')
+        self.assertNotIn('immutable', photo['Cache-Control'])
+        self.assertIn('max-age=3600', photo['Cache-Control'])
+
+    def test_not_modified(self):
+        """Неизменённый файл не отдаётся повторно."""
+        last_modified = self.get('posts/photo.jpg')['Last-Modified']
+        response = self.get(
+            'posts/photo.jpg', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside(self):
+        """Нет файла или путь выходит за MEDIA_ROOT — 404."""
+        for path in ('posts/missing.jpg', 'posts', '../settings.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        """С MEDIA_ACCEL_REDIRECT файл отдаёт nginx."""
+        response = self.get('cache/ab/cd/thumb.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/cache/ab/cd/thumb.jpg',
+        )
+        self.assertEqual(response.content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect_non_ascii(self):
+        """Имя не в ASCII передаётся nginx в процентном кодировании."""
+        with open(os.path.join(self.media_root, 'posts/фото.jpg'), 'wb'):
+            pass
+        response = self.get('posts/фото.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/posts/%D1%84%D0%BE%D1%82%D0%BE.jpg',
+        )
@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from core import css
+
+BOOTSTRAP = 'css/bootstrap.min.css'
+
+
+class CssSubsetTests(SimpleTestCase):
+    def test_subset(self):
+        """Остаются селекторы из шаблонов, @media сокращается."""
+        source = (
+            '@charset "UTF-8";/*! лицензия */:root{--a:1}'
+            '.used,.unused{color:red}.unused .used{margin:0}'
+            'a:not(.x,.y){top:0}#main{left:0}'
+            '@media (min-width:1px){.unused{color:blue}.used{color:green}}'
+            '@media print{.unused{display:none}}'
+            '@keyframes spin{to{transform:rotate(1turn)}}'
+            '.used::after{content:"{"}'
+        )
+        self.assertEqual(
+            css.subset(source, {'used'}, {'main'}),
+            '@charset "UTF-8";/*! лицензия */:root{--a:1}'
+            '.used{color:red}#main{left:0}'
+            '@media (min-width:1px){.used{color:green}}'
+            '@keyframes spin{to{transform:rotate(1turn)}}'
+            '.used::after{content:"{"}',
+        )
+
+    def test_template_names(self):
+        """Классы собираются из class=, |addclass и без шаблонных тегов."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'page.html'), 'w') as template:
+            template.write(
+                '<a class="nav-link {% if on %}active{% endif %}" id="top">'
+                "{{ form.text|addclass:'form-control' }}"
+            )
+        self.assertEqual(
+            css.template_names([directory]),
+            ({'nav-link', 'active', 'form-control'}, {'top'}),
+        )
+
+
+class CollectedStaticTests(SimpleTestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        override = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATIC_CSS_SUBSET=(BOOTSTRAP,),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.static_root)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.url = static(BOOTSTRAP)
+        self.hashed = self.url[len('/static/'):]
+
+    def test_hashed_and_compressed(self):
+        """CSS получает хэш в имени, сокращается и сжимается заранее."""
+        self.assertNotEqual(self.hashed, BOOTSTRAP)
+        path = os.path.join(self.static_root, self.hashed)
+        with open(path, 'rb') as subset, open(path + '.gz', 'rb') as packed:
+            content = subset.read()
+            self.assertEqual(gzip.decompress(packed.read()), content)
+        self.assertIn(b'.navbar', content)
+        self.assertNotIn(b'.carousel', content)
+
+    def test_serves_precompressed(self):
+        """Сжатая копия отдаётся по Accept-Encoding и кэшируется
+        навсегда."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        plain = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity'
+        )
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertLess(
+            int(response['Content-Length']), int(plain['Content-Length'])
+        )
+
+    def test_unhashed_name_revalidates(self):
+        """Файл без хэша в имени кэшируется ненадолго."""
+        response = self.client.get(f'/static/{BOOTSTRAP}')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+
+class MissingManifestTests(SimpleTestCase):
+    @override_settings(STATIC_ROOT=tempfile.gettempdir())
+    def test_falls_back_to_plain_names(self):
+        """Без собранной статики ссылки ведут на исходные имена."""
+        self.assertFalse(staticfiles_storage.hashed_files)
+        self.assertEqual(static(BOOTSTRAP), f'/static/{BOOTSTRAP}')
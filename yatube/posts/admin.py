@@ -1,10 +1,16 @@
 from django.contrib import admin
 
+from .caching import FEED
+from .counters import estimate_posts
+from .forms import PostAdminForm
 from .models import Comment, Follow, Group, Post
+from .search import matching_posts, query_terms
+from .utils import AdminPaginator
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
+    form = PostAdminForm
     list_display = (
         'pk',
         'text',
@@ -13,11 +19,53 @@ class PostAdmin(admin.ModelAdmin):
         'group'
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return AdminPaginator(queryset, per_page, FEED, estimate_posts)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """Список групп для select выбирается один раз на запрос, а не
+        отдельным запросом в каждой строке списка."""
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            if not hasattr(request, 'group_choices'):
+                request.group_choices = [*iter(field.choices)]
+            field.choices = request.group_choices
+        return field
+
+    def get_search_results(self, request, queryset, search_term):
+        """Число ищется как id поста, слова — по обратному индексу вместо
+        LIKE по всей таблице."""
+        search_term = search_term.strip()
+        if search_term.isdecimal():
+            return queryset.filter(pk=int(search_term)), False
+        terms = query_terms(search_term)
+        if not terms:
+            return queryset, False
+        return queryset.filter(pk__in=matching_posts(terms)), False
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    show_full_result_count = False
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    show_full_result_count = False
+
 
 admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
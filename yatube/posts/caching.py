@@ -0,0 +1,342 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from django.views.decorators.http import condition
+
+from .models import Post
+
+FEED = 'feed'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+PRESERVED_HTML = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I
+)
+MIN_COMPRESSED_LENGTH = 200
+
+
+def group_namespace(slug):
+    return f'group:{slug}'
+
+
+def author_namespace(username):
+    return f'author:{username}'
+
+
+def post_namespace(post_id):
+    return f'post:{post_id}'
+
+
+def user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def initial_generation():
+    """Стартовое значение счётчика: после вытеснения ключа из кэша
+    поколение не повторит ни одно из прежних."""
+    return time.time_ns() // 1000
+
+
+def modified_key(namespace):
+    return f'modified:{namespace}'
+
+
+def generations(namespaces):
+    """Текущие поколения пространств имён одним обращением к кэшу."""
+    keys = [generation_key(namespace) for namespace in namespaces]
+    return load_generations(keys, cache.get_many(keys))
+
+
+def load_generations(keys, found):
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, initial_generation(), timeout=None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, 0) for key in keys]
+
+
+def namespace_state(namespaces):
+    """Поколения и время последнего изменения одним обращением к кэшу.
+
+    Если время изменения вытеснено из кэша, им становится текущий
+    момент: страница могла измениться, пока ключа не было.
+    """
+    keys = [generation_key(namespace) for namespace in namespaces]
+    modified_keys = [modified_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys + modified_keys)
+    missing = [key for key in modified_keys if key not in found]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    modified = [found[key] for key in modified_keys if key in found]
+    return load_generations(keys, found), max(modified, default=None)
+
+
+def bump(*namespaces):
+    """Инвалидирует всё, что закэшировано под этими пространствами имён."""
+    namespaces = set(namespaces)
+    for namespace in namespaces:
+        key = generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_generation(), timeout=None)
+    now = time.time()
+    cache.set_many(
+        {modified_key(namespace): now for namespace in namespaces},
+        timeout=None,
+    )
+
+
+def feed_namespaces():
+    return [FEED]
+
+
+def group_namespaces(slug):
+    return [group_namespace(slug)]
+
+
+def profile_namespaces(username):
+    return [author_namespace(username)]
+
+
+def post_author_key(post_id):
+    return f'post-author:{post_id}'
+
+
+def detail_namespaces(post_id):
+    """Пост и его автор: от автора зависит число его постов на странице.
+
+    Автор поста не меняется, поэтому его имя берётся из кэша, и запрос
+    к базе нужен только при первом обращении.
+    """
+    key = post_author_key(post_id)
+    username = cache.get(key)
+    if username is None:
+        username = Post.objects.filter(pk=post_id).values_list(
+            'author__username', flat=True
+        ).first()
+        if username is not None:
+            cache.set(key, username, timeout=None)
+    return [post_namespace(post_id), author_namespace(username)]
+
+
+def page_validators(request, namespaces, kwargs):
+    """ETag и Last-Modified страницы, вычисленные один раз на запрос."""
+    if not hasattr(request, 'page_validators'):
+        versions, modified = namespace_state(namespaces(**kwargs))
+        user = request.user.pk if request.user.is_authenticated else 'anon'
+        encoding = 'gzip' if accepts_gzip(request) else 'identity'
+        etag = hashlib.md5(
+            f'{request.get_full_path()}:{user}:{versions}:{encoding}'.encode()
+        ).hexdigest()
+        if modified is not None:
+            modified = datetime.fromtimestamp(modified, tz=timezone.utc)
+        request.page_validators = etag, modified
+    return request.page_validators
+
+
+def conditional_page(namespaces):
+    """Отвечает 304 Not Modified по поколениям пространств имён страницы,
+    не выполняя запросов ленты и не рендеря шаблон."""
+    def etag(request, *args, **kwargs):
+        return page_validators(request, namespaces, kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return page_validators(request, namespaces, kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+HIT = 'hit'
+MISS = 'miss'
+STALE = 'stale'
+REFRESH = 'refresh'
+METRICS = (HIT, MISS, STALE, REFRESH)
+
+
+def metric_key(status):
+    return f'page_cache:metrics:{status}'
+
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+_metrics_flushed = time.monotonic()
+
+
+def count_metric(status):
+    """Считает в памяти процесса и сбрасывает счётчики в общий кэш не
+    чаще раза в PAGE_CACHE_METRICS_INTERVAL секунд: запись на каждый
+    запрос брала бы общую блокировку кэша на горячем пути."""
+    with _metrics_lock:
+        _metrics[status] += 1
+        elapsed = time.monotonic() - _metrics_flushed
+        if elapsed < settings.PAGE_CACHE_METRICS_INTERVAL:
+            return
+    flush_metrics()
+
+
+def flush_metrics():
+    global _metrics_flushed
+    with _metrics_lock:
+        pending = dict(_metrics)
+        _metrics.clear()
+        _metrics_flushed = time.monotonic()
+    for status, delta in pending.items():
+        key = metric_key(status)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+
+
+def page_cache_metrics():
+    """Сколько раз страницы отдавались из кэша, рендерились или
+    отдавались устаревшими, пока их обновлял другой воркер.
+
+    Счёт других процессов виден с задержкой до
+    PAGE_CACHE_METRICS_INTERVAL.
+    """
+    found = cache.get_many([metric_key(status) for status in METRICS])
+    with _metrics_lock:
+        return {
+            status: found.get(metric_key(status), 0) + _metrics[status]
+            for status in METRICS
+        }
+
+
+def jittered(timeout):
+    """Разброс TTL, чтобы страницы не устаревали одновременно."""
+    jitter = settings.PAGE_CACHE_JITTER
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    return f'page:{request.method}:{path}:{user}'
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP.search(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    ))
+
+
+def minify_html(html):
+    """Схлопывает пробелы между строками и внутри них.
+
+    Содержимое pre, textarea, script и style не трогается.
+    """
+    parts, position = [], 0
+    for match in PRESERVED_HTML.finditer(html):
+        parts.append(collapse_whitespace(html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(collapse_whitespace(html[position:]))
+    return ''.join(parts)
+
+
+def collapse_whitespace(text):
+    return re.sub(r'[ \t]{2,}', ' ', re.sub(r'\s*\n\s*', '\n', text))
+
+
+def cacheable_body(response):
+    """Готовит HTML к хранению: по PAGE_CACHE_MINIFY ужимает пробелы и
+    возвращает сжатое gzip тело или None, если сжимать не стоит."""
+    if not response.get('Content-Type', '').startswith('text/html'):
+        return None
+    if settings.PAGE_CACHE_MINIFY:
+        response.content = minify_html(
+            response.content.decode(response.charset)
+        )
+    if len(response.content) < MIN_COMPRESSED_LENGTH:
+        return None
+    compressed = compress_string(response.content)
+    return compressed if len(compressed) < len(response.content) else None
+
+
+def encode(request, response, compressed):
+    """Отдаёт заранее сжатое тело клиентам, которые принимают gzip."""
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if compressed is not None and accepts_gzip(request):
+        response.content = compressed
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = str(len(compressed))
+    return response
+
+
+def page_cache(namespaces, timeout=None):
+    """Кэширует страницу до изменения её пространств имён.
+
+    namespaces получает именованные аргументы view и возвращает
+    пространства имён, от которых зависит страница. Копия страницы
+    хранится вместе с поколениями, под которыми она отрисована. Когда
+    поколение сменилось или копия устарела по времени, страницу
+    перерисовывает только воркер, взявший блокировку, а остальные тем
+    временем отдают устаревшую копию.
+
+    Рядом с копией хранится её тело, уже сжатое gzip: клиентам с
+    Accept-Encoding: gzip оно отдаётся без повторного сжатия.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_key(request)
+            lock_key = f'{key}:lock'
+            versions = generations(namespaces(**kwargs))
+            entry = cache.get(key)
+            if entry is None:
+                status = MISS
+            elif entry[0] == versions and entry[1] > time.time():
+                status = HIT
+            elif cache.add(lock_key, True, settings.PAGE_CACHE_LOCK_TIMEOUT):
+                status = REFRESH
+            else:
+                status = STALE
+
+            compressed = None
+            if status in (HIT, STALE):
+                response = entry[2]
+                compressed = entry[3] if len(entry) > 3 else None
+            else:
+                try:
+                    response = view(request, *args, **kwargs)
+                    if (response.status_code == 200
+                            and not response.streaming):
+                        compressed = cacheable_body(response)
+                        fresh_for = jittered(
+                            timeout or settings.PAGE_CACHE_TIMEOUT
+                        )
+                        cache.set(
+                            key,
+                            (versions, time.time() + fresh_for, response,
+                             compressed),
+                            fresh_for + settings.PAGE_CACHE_STALE_TIMEOUT,
+                        )
+                finally:
+                    if status == REFRESH:
+                        cache.delete(lock_key)
+            count_metric(status)
+            response['X-Cache'] = status
+            return encode(request, response, compressed)
+        return wrapper
+    return decorator
@@ -0,0 +1,71 @@
+from django.db.models import Count, F, Max
+
+from .models import Comment, Follow, Post, PostStats, UserStats
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author_id'),
+    'comments_count': (Comment, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+}
+POST_COUNTERS = {
+    'comments_count': (Comment, 'post_id'),
+}
+
+
+def count_by(model, field, ids):
+    return dict(
+        model.objects.filter(**{f'{field}__in': ids}).values(field).annotate(
+            total=Count('pk')
+        ).values_list(field, 'total')
+    )
+
+
+def recount(stats_model, counters, ids):
+    """Точные значения счётчиков для ids: по запросу на счётчик."""
+    totals = {
+        name: count_by(model, field, ids)
+        for name, (model, field) in counters.items()
+    }
+    return {
+        pk: stats_model(
+            pk=pk,
+            **{name: totals[name].get(pk, 0) for name in counters}
+        )
+        for pk in ids
+    }
+
+
+def shift(stats_model, pk, **deltas):
+    """Сдвигает счётчики одним UPDATE с F().
+
+    Отсутствующая строка не создаётся: её посчитает первое чтение, а
+    расхождения исправит reconcile_counters.
+    """
+    floors = {
+        f'{name}__gte': -delta for name, delta in deltas.items() if delta < 0
+    }
+    stats_model.objects.filter(pk=pk, **floors).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def get_stats(stats_model, counters, pk):
+    stats = stats_model.objects.filter(pk=pk).first()
+    if stats is None:
+        stats = recount(stats_model, counters, [pk])[pk]
+        stats.save()
+    return stats
+
+
+def user_stats(user):
+    return get_stats(UserStats, USER_COUNTERS, user.pk)
+
+
+def post_stats(post):
+    return get_stats(PostStats, POST_COUNTERS, post.pk)
+
+
+def estimate_posts():
+    """Верхняя оценка числа постов по первичному ключу, без COUNT(*)."""
+    return Post.objects.aggregate(last=Max('pk'))['last'] or 0
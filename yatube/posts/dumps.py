@@ -0,0 +1,169 @@
+import csv
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+from .models import Comment, Follow, Post
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+
+
+class Table(NamedTuple):
+    """Что выгружать из модели: {колонка: путь ORM} и поле отметки
+    времени для инкрементальной выгрузки."""
+    model: type
+    columns: dict
+    watermark: Optional[str] = None
+
+
+TABLES = {
+    'posts': Table(
+        Post,
+        {
+            'id': 'id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'image': 'image',
+        },
+        watermark='pub_date',
+    ),
+    'comments': Table(
+        Comment,
+        {
+            'id': 'id',
+            'post': 'post_id',
+            'author': 'author__username',
+            'text': 'text',
+            'created': 'created',
+        },
+        watermark='created',
+    ),
+    'follows': Table(
+        Follow,
+        {
+            'id': 'id',
+            'user': 'user__username',
+            'author': 'author__username',
+        },
+    ),
+}
+
+
+def file_name(table, output_format, compress):
+    name = f'{table}.{output_format}'
+    return f'{name}.gz' if compress else name
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def rows(table, since=None, until=None, chunk_size=2000):
+    """Строки таблицы словарями {колонка: значение} по возрастанию id.
+
+    Для таблиц с отметкой времени берутся строки в (since, until].
+    Строки читаются курсором по chunk_size, без экземпляров моделей.
+    """
+    queryset = table.model.objects.order_by('id')
+    if since is not None and table.watermark:
+        queryset = queryset.filter(**{f'{table.watermark}__gt': since})
+    if until is not None and table.watermark:
+        queryset = queryset.filter(**{f'{table.watermark}__lte': until})
+    paths = list(table.columns.values())
+    names = list(table.columns)
+    for values in queryset.values_list(*paths).iterator(chunk_size):
+        yield dict(zip(names, values))
+
+
+def write(file, table, records, output_format):
+    """Пишет строки в файл и возвращает их число.
+
+    Даты пишутся в ISO 8601 с микросекундами, чтобы загрузка вернула
+    их без потерь.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    writer = None
+    if output_format == CSV:
+        writer = csv.DictWriter(file, fieldnames=list(table.columns))
+        writer.writeheader()
+    count = 0
+    for record in records:
+        encoded = {
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for name, value in record.items()
+        }
+        if writer is None:
+            file.write(encoder.encode(encoded))
+            file.write('\n')
+        else:
+            writer.writerow(encoded)
+        count += 1
+    return count
+
+
+def export(table_name, directory, output_format=NDJSON, compress=False,
+           since=None, until=None, chunk_size=2000):
+    """Выгружает таблицу в файл каталога directory; возвращает путь и
+    число строк."""
+    table = TABLES[table_name]
+    path = os.path.join(
+        directory, file_name(table_name, output_format, compress)
+    )
+    with open_output(path, compress) as file:
+        count = write(
+            file, table, rows(table, since, until, chunk_size),
+            output_format,
+        )
+    return path, count
+
+
+def dump_files(directory):
+    """{таблица: путь} для файлов выгрузки, что есть в каталоге."""
+    found = {}
+    for table in TABLES:
+        for output_format in FORMATS:
+            for compress in (False, True):
+                path = os.path.join(
+                    directory, file_name(table, output_format, compress)
+                )
+                if table not in found and os.path.exists(path):
+                    found[table] = path
+    return found
+
+
+def read(path):
+    """Строки файла выгрузки словарями, по одной."""
+    compress = path.endswith('.gz')
+    opener = gzip.open if compress else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as file:
+        if path.endswith((f'.{CSV}', f'.{CSV}.gz')):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Снимает auto_now_add с полей дат моделей, чтобы bulk_create
+    сохранил даты из выгрузки."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
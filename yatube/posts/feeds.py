@@ -0,0 +1,175 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow, Post, Timeline
+from .utils import CURSOR_PARAM, POST_PER_PAGE, CursorPaginator
+
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+POST_ORDERING = ('-pub_date', '-pk')
+
+
+def pull_key(author_id):
+    return f'feed:pull:{author_id}'
+
+
+def count_followers(author_ids):
+    return dict(
+        Follow.objects.filter(author_id__in=author_ids).values(
+            'author_id'
+        ).annotate(followers=Count('id')).values_list(
+            'author_id', 'followers'
+        )
+    )
+
+
+def pulled_authors(author_ids):
+    """Авторы, чьи посты подтягиваются при чтении, а не раскладываются.
+
+    Класс автора хранится в кэше; промахи досчитываются одним запросом
+    к Follow.
+    """
+    keys = {pull_key(author_id): author_id for author_id in author_ids}
+    classes = cache.get_many(keys)
+    missing = [author_id for key, author_id in keys.items()
+               if key not in classes]
+    if missing:
+        followers = count_followers(missing)
+        fresh = {
+            pull_key(author_id):
+                followers.get(author_id, 0) > settings.FEED_PULL_THRESHOLD
+            for author_id in missing
+        }
+        cache.set_many(fresh, timeout=None)
+        classes.update(fresh)
+    return {keys[key] for key, pulled in classes.items() if pulled}
+
+
+def is_pulled(author_id):
+    return author_id in pulled_authors([author_id])
+
+
+def reclassify(author_id):
+    """Пересчитывает класс автора после изменения числа подписчиков.
+
+    Автор, опустившийся ниже порога, снова раскладывается при записи,
+    поэтому его свежие посты дописываются во входящие подписчиков.
+    Класс, вытесненный из кэша, считается «подтягивался»: дописывание
+    идемпотентно, а у автора ниже порога подписчиков немного.
+    """
+    was_pulled = cache.get(pull_key(author_id), True)
+    followers = count_followers([author_id]).get(author_id, 0)
+    pulled = followers > settings.FEED_PULL_THRESHOLD
+    cache.set(pull_key(author_id), pulled, timeout=None)
+    if was_pulled and not pulled:
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        for user_id in followers:
+            backfill(user_id, author_id)
+    return pulled
+
+
+def timeline_entry(user_id, post):
+    return Timeline(
+        user_id=user_id,
+        post=post,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def push_post(post):
+    """Раскладывает новый пост во входящие ленты подписчиков автора."""
+    if is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True).iterator()
+    batch = []
+    for user_id in followers:
+        batch.append(timeline_entry(user_id, post))
+        if len(batch) >= settings.FEED_WRITE_BATCH_SIZE:
+            Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту свежие посты автора после подписки.
+
+    Берутся только последние FEED_BACKFILL_SIZE постов: так подписка на
+    плодовитого автора стоит ограниченное число вставок. Более ранние
+    посты в ленту подписок намеренно не попадают.
+    """
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    )[:settings.FEED_BACKFILL_SIZE]
+    Timeline.objects.bulk_create(
+        [timeline_entry(user_id, post) for post in posts],
+        batch_size=settings.FEED_WRITE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow(user_id, author_id):
+    if not reclassify(author_id):
+        backfill(user_id, author_id)
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    Timeline.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_ids):
+    """Пересобирает ленты пользователей с нуля по графу подписок."""
+    Timeline.objects.filter(user_id__in=user_ids).delete()
+    follows = Follow.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'author_id'
+    )
+    for user_id, author_id in follows:
+        if not is_pulled(author_id):
+            backfill(user_id, author_id)
+
+
+class FollowFeedPaginator(CursorPaginator):
+    """Лента подписок: входящие плюс посты авторов, подтянутые при чтении.
+
+    Оба источника упорядочены по (pub_date, id), поэтому страница — это
+    слияние двух диапазонных чтений по одному и тому же курсору.
+    """
+
+    def __init__(self, user, per_page):
+        followed = Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        )
+        pulled = Post.objects.filter(
+            author_id__in=pulled_authors(followed)
+        ).select_related('author', 'group')
+        super().__init__(pulled, per_page, POST_ORDERING)
+        self.inbox = CursorPaginator(
+            Timeline.objects.filter(user=user).select_related(
+                'post__author', 'post__group'
+            ),
+            per_page,
+            TIMELINE_ORDERING,
+        )
+
+    def fetch(self, values, reverse, limit):
+        posts = {
+            entry.post_id: entry.post
+            for entry in self.inbox.fetch(values, reverse, limit)
+        }
+        for post in super().fetch(values, reverse, limit):
+            posts.setdefault(post.pk, post)
+        return sorted(
+            posts.values(),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=not reverse,
+        )[:limit]
+
+
+def follow_page(request):
+    feed_paginator = FollowFeedPaginator(request.user, POST_PER_PAGE)
+    return feed_paginator.get_page(request.GET.get(CURSOR_PARAM))
@@ -1,9 +1,44 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import check_limits, ingest
 from .models import Comment, Post
 
 
-class PostForm(forms.ModelForm):
+class PostImageMixin:
+    """Проверка лимитов и подготовка картинки поста к хранению.
+
+    Под bounded_uploads файл сверх лимита обрезан, поэтому форма
+    отклоняет его по размеру, не открывая. Повреждённая картинка
+    отклоняется при перекодировании.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Картинка сверх лимитов убирается из формы до того, как поле
+        ImageField откроет её целиком."""
+        super().__init__(*args, **kwargs)
+        self.image_error = None
+        upload = self.files.get('image')
+        if upload is None:
+            return
+        try:
+            check_limits(upload)
+        except ValidationError as error:
+            self.image_error = error
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.image_error is not None:
+            raise self.image_error
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return ingest(image)
+        return image
+
+
+class PostForm(PostImageMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ('group', 'text', 'image')
@@ -13,6 +48,12 @@ class PostForm(forms.ModelForm):
         }
 
 
+class PostAdminForm(PostImageMixin, forms.ModelForm):
+    class Meta:
+        model = Post
+        fields = '__all__'
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
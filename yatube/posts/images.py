@@ -0,0 +1,186 @@
+import logging
+import os
+import time
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.fields.files import ImageFieldFile
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete
+
+from .models import Post, StoredImage
+from .storage import is_hashed
+
+logger = logging.getLogger(__name__)
+
+REENCODED = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+}
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл кусками и перестаёт писать, как
+    только файл превысил POST_IMAGE_MAX_BYTES.
+
+    Размер файла остаётся настоящим, поэтому форма отклоняет его, не
+    открывая. Файл сверх лимита обрезан, так что обработчик ставится
+    декоратором bounded_uploads только на представления с формой поста.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) <= settings.POST_IMAGE_MAX_BYTES:
+            self.file.write(raw_data)
+
+
+def bounded_uploads(view):
+    """Принимает файлы запроса через BoundedUploadHandler.
+
+    Обработчики загрузки можно сменить только до чтения тела запроса, а
+    его читает проверка CSRF, поэтому она выполняется уже внутри.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [BoundedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+def check_limits(upload):
+    """Проверяет размер файла и число пикселей по заголовку картинки,
+    не декодируя её."""
+    max_bytes = settings.POST_IMAGE_MAX_BYTES
+    if upload.size > max_bytes:
+        raise ValidationError(
+            f'Файл больше {filesizeformat(max_bytes)}.', code='too_large'
+        )
+    max_pixels = settings.POST_IMAGE_MAX_PIXELS
+    error = ValidationError(
+        f'Картинка больше {max_pixels // 1000000} мегапикселей.',
+        code='too_many_pixels',
+    )
+    try:
+        with Image.open(upload) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise error
+    except (OSError, SyntaxError):
+        return
+    finally:
+        upload.seek(0)
+    if width * height > max_pixels:
+        raise error
+
+
+def ingest(upload):
+    """Готовит загруженную картинку к хранению.
+
+    JPEG, PNG и WebP перекодируются без метаданных (с поворотом по EXIF)
+    и уменьшаются до POST_IMAGE_MAX_SIDE по большей стороне; JPEG
+    декодируется сразу в уменьшенном масштабе. Остальные форматы
+    сохраняются как есть. Время обработки пишется в лог.
+    """
+    started = time.monotonic()
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    try:
+        with Image.open(upload) as image:
+            image_format = image.format
+            if image_format not in REENCODED:
+                upload.seek(0)
+                return upload
+            image.draft(image.mode, (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            buffer = BytesIO()
+            image.save(buffer, image_format, **REENCODED[image_format])
+            size = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Картинка повреждена или обрезана.', code='broken'
+        )
+    stored = SimpleUploadedFile(
+        os.path.basename(upload.name),
+        buffer.getvalue(),
+        upload.content_type,
+    )
+    logger.info(
+        'Картинка %s: %s -> %s байт, %sx%s, %.1f мс',
+        upload.name,
+        upload.size,
+        stored.size,
+        *size,
+        (time.monotonic() - started) * 1000,
+    )
+    return stored
+
+
+def retain(name):
+    """Ещё один пост ссылается на файл картинки."""
+    StoredImage.objects.get_or_create(name=name)
+    StoredImage.objects.filter(name=name).update(
+        references=F('references') + 1
+    )
+
+
+def release(name):
+    """Пост больше не ссылается на файл; последний освобождает его.
+
+    Файл и его миниатюры удаляются после коммита, если за это время на
+    него не сослался новый пост.
+    """
+    StoredImage.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    transaction.on_commit(lambda: collect(name))
+
+
+def collect(name):
+    """Удаляет файл без ссылок вместе с миниатюрами.
+
+    Файлы, названные не по содержимому, остаются на месте: их имена
+    выбирал не этот механизм, и на них могут ссылаться извне.
+    """
+    deleted, _ = StoredImage.objects.filter(
+        name=name, references=0
+    ).delete()
+    if not deleted or not is_hashed(name):
+        return
+    try:
+        delete(ImageFieldFile(None, Post.image.field, name))
+    except (OSError, SuspiciousFileOperation):
+        logger.exception('Не удалось удалить картинку %s', name)
+
+
+def recount_images():
+    """Пересчитывает ссылки на все файлы по таблице постов."""
+    references = dict(
+        Post.objects.exclude(image='').order_by().values('image').annotate(
+            total=Count('pk')
+        ).values_list('image', 'total')
+    )
+    with transaction.atomic():
+        StoredImage.objects.exclude(name__in=references).update(references=0)
+        StoredImage.objects.bulk_create(
+            [StoredImage(name=name) for name in references],
+            ignore_conflicts=True,
+        )
+        for name, total in references.items():
+            StoredImage.objects.filter(name=name).update(references=total)
+    for name in StoredImage.objects.filter(references=0).values_list(
+        'name', flat=True
+    ):
+        collect(name)
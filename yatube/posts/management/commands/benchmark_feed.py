@@ -0,0 +1,74 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from posts import feeds
+from posts.models import Follow, Post, Timeline, User
+
+STRATEGIES = (
+    ('push', lambda followers: followers),
+    ('hybrid', lambda followers: followers // 2),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает раскладку при записи и гибридную ленту: '
+        'сколько строк входящих пишет один пост и сколько стоит чтение. '
+        'Все данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument('--reads', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author, readers = self.create_graph(options['followers'])
+            for name, threshold in STRATEGIES:
+                with override_settings(
+                    FEED_PULL_THRESHOLD=threshold(options['followers'])
+                ):
+                    cache.delete(feeds.pull_key(author.pk))
+                    self.report(name, author, readers, options)
+            transaction.set_rollback(True)
+
+    def create_graph(self, followers):
+        author = User.objects.create_user(username='benchmark-author')
+        User.objects.bulk_create(
+            User(username=f'benchmark-reader-{number}')
+            for number in range(followers)
+        )
+        readers = list(
+            User.objects.filter(username__startswith='benchmark-reader-')
+        )
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=author) for reader in readers
+        )
+        return author, readers
+
+    def report(self, name, author, readers, options):
+        rows_before = Timeline.objects.count()
+        started = time.perf_counter()
+        for number in range(options['posts']):
+            Post.objects.create(author=author, text=f'Пост {number}')
+        write_time = time.perf_counter() - started
+        rows = Timeline.objects.count() - rows_before
+
+        sample = readers[:options['reads']]
+        started = time.perf_counter()
+        for reader in sample:
+            feeds.FollowFeedPaginator(reader, feeds.POST_PER_PAGE).get_page()
+        read_time = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{name}: '
+            f'строк входящих на пост {rows / options["posts"]:.1f}, '
+            f'запись поста {write_time / options["posts"] * 1000:.2f} мс, '
+            f'чтение ленты {read_time / max(len(sample), 1) * 1000:.2f} мс'
+        )
+        Post.objects.filter(author=author).delete()
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов читать из базы за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk').only(
+            'pk', 'image'
+        )
+        last_pk = 0
+        generated = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            images = [post.image for post in batch]
+            pictures = {
+                geometry: thumbnails.lookup_many(images, geometry)
+                for geometry in thumbnails.GEOMETRIES
+            }
+            for number, post in enumerate(batch):
+                if any(
+                    found[number] is None
+                    or len(found[number].files)
+                    < len(thumbnails.variants(geometry))
+                    for geometry, found in pictures.items()
+                ):
+                    thumbnails.generate(post.pk)
+                    generated += 1
+            last_pk = batch[-1].pk
+        self.stdout.write(f'Построены миниатюры для постов: {generated}')
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import caching, images, thumbnails
+from posts.models import Post
+from posts.storage import content_hash, hashed_name, image_storage, is_hashed
+
+
+def digest(name):
+    with image_storage.open(name) as content:
+        return content_hash(content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище по содержимому: считает '
+        'хэши файлов параллельно, переименовывает ссылки и пересчитывает '
+        'счётчики ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько файлов хэшировать одновременно.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько файлов переносить за один проход.',
+        )
+        parser.add_argument(
+            '--delete-originals',
+            action='store_true',
+            help='Удалить старые файлы после переноса.',
+        )
+
+    def handle(self, *args, **options):
+        stored = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        names = sorted(name for name in stored if not is_hashed(name))
+        migrated = missing = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for start in range(0, len(names), options['batch_size']):
+                batch = names[start:start + options['batch_size']]
+                for name, found in zip(batch, pool.map(self.hash, batch)):
+                    if found is None:
+                        missing += 1
+                        continue
+                    self.migrate(name, found, options['delete_originals'])
+                    migrated += 1
+        images.recount_images()
+        self.stdout.write(
+            f'Перенесено файлов: {migrated}, не найдено: {missing}'
+        )
+
+    def hash(self, name):
+        try:
+            return digest(name)
+        except OSError:
+            return None
+
+    def migrate(self, name, sha256, delete_original):
+        new_name = hashed_name(name, sha256)
+        if not image_storage.exists(new_name):
+            with image_storage.open(name) as content:
+                image_storage.save(new_name, content)
+        posts = Post.objects.filter(image=name)
+        affected = list(posts.values_list(
+            'pk', 'author__username', 'group__slug'
+        ))
+        posts.update(image=new_name)
+        namespaces = {caching.FEED}
+        for post_id, username, slug in affected:
+            namespaces.add(caching.post_namespace(post_id))
+            namespaces.add(caching.author_namespace(username))
+            if slug is not None:
+                namespaces.add(caching.group_namespace(slug))
+        caching.bump(*namespaces)
+        thumbnails.generate(affected[0][0])
+        if delete_original:
+            image_storage.delete(name)
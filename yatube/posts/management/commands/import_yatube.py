@@ -0,0 +1,277 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, dumps, feeds, images, signals
+from posts.models import Comment, Follow, Group, Post, User
+
+CHECKPOINT_NAME = 'import.checkpoint.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, комментарии и подписки из файлов export_yatube '
+        'пачками bulk_create, по транзакции на пачку. Обработчики сигналов '
+        'на время загрузки отключены; ленты, счётчики, поисковый индекс, '
+        'ссылки на картинки и миниатюры пересобираются в конце. Прерванная '
+        'загрузка продолжается с последней сохранённой пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            help='Каталог с posts.ndjson, comments.ndjson, follows.ndjson '
+                 '(или .csv, можно .gz).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл отметок загрузки; по умолчанию '
+                 f'{CHECKPOINT_NAME} в каталоге выгрузки.',
+        )
+
+    def handle(self, *args, **options):
+        files = dumps.dump_files(options['directory'])
+        if not files:
+            raise CommandError(
+                f'В {options["directory"]} нет файлов выгрузки'
+            )
+        self.checkpoint_path = options['checkpoint'] or os.path.join(
+            options['directory'], CHECKPOINT_NAME
+        )
+        self.checkpoint = self.load_checkpoint()
+        self.touched = {'authors': set(), 'groups': set(), 'posts': set()}
+        loaders = {
+            'posts': self.load_posts,
+            'comments': self.load_comments,
+            'follows': self.load_follows,
+        }
+        with signals.suspended(), dumps.explicit_dates(Post, Comment):
+            for table, loader in loaders.items():
+                if table in files:
+                    self.load(table, files[table], loader,
+                              options['batch_size'])
+        self.rebuild()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save_checkpoint(self):
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(temporary, self.checkpoint_path)
+
+    def load(self, table, path, loader, batch_size):
+        """Загружает файл пачками; строки, загруженные до прерывания,
+        пропускаются."""
+        done = self.checkpoint.get(table, 0)
+        records = dumps.read(path)
+        for record in islice(records, done):
+            self.touch(table, record)
+        started = time.perf_counter()
+        loaded = 0
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            for record in batch:
+                self.touch(table, record)
+            with transaction.atomic():
+                loader(batch)
+            loaded += len(batch)
+            self.checkpoint[table] = done + loaded
+            self.save_checkpoint()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{table}: {loaded} строк за {elapsed:.2f} с '
+            f'({loaded / max(elapsed, 1e-6):.0f} строк/с)'
+            + (f', пропущено уже загруженных: {done}' if done else '')
+        )
+
+    def touch(self, table, record):
+        """Запоминает страницы, чей кэш надо сбросить в конце."""
+        self.touched['authors'].add(record['author'])
+        if table == 'posts' and record.get('group'):
+            self.touched['groups'].add(record['group'])
+        if table == 'comments':
+            self.touched['posts'].add(int(record['post']))
+
+    @staticmethod
+    def user_ids(usernames):
+        """{username: id}; недостающие пользователи создаются без
+        пароля."""
+        usernames = set(usernames)
+        found = dict(User.objects.filter(username__in=usernames).values_list(
+            'username', 'pk'
+        ))
+        missing = usernames - set(found)
+        if missing:
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None))
+                 for name in missing],
+                ignore_conflicts=True,
+            )
+            found.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+        return found
+
+    @staticmethod
+    def group_ids(slugs):
+        slugs = {slug for slug in slugs if slug}
+        found = dict(Group.objects.filter(slug__in=slugs).values_list(
+            'slug', 'pk'
+        ))
+        missing = slugs - set(found)
+        if missing:
+            Group.objects.bulk_create(
+                [Group(slug=slug, title=slug, description='')
+                 for slug in missing],
+                ignore_conflicts=True,
+            )
+            found.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+        return found
+
+    @staticmethod
+    def check_ids(model, batch, columns):
+        """Падает, если id из выгрузки здесь занят другой строкой.
+
+        columns — {поле ORM: колонка выгрузки}, по которым строка
+        считается уже загруженной; такие строки повторная загрузка
+        пропускает.
+        """
+        ids = {int(record['id']): record for record in batch}
+        existing = model.objects.filter(pk__in=ids).values_list(
+            'pk', *columns
+        )
+        clashes = []
+        for pk, *values in existing.iterator():
+            record = ids[pk]
+            for value, column in zip(values, columns.values()):
+                raw = record[column]
+                if hasattr(value, 'isoformat'):
+                    same = value == parse_datetime(raw)
+                else:
+                    same = str(value) == str(raw)
+                if not same:
+                    clashes.append(pk)
+                    break
+        if clashes:
+            raise CommandError(
+                f'{model._meta.verbose_name_plural}: id {clashes} из '
+                f'выгрузки уже заняты другими строками'
+            )
+
+    def load_posts(self, batch):
+        self.check_ids(Post, batch, {
+            'author__username': 'author',
+            'pub_date': 'pub_date',
+            'text': 'text',
+        })
+        authors = self.user_ids(record['author'] for record in batch)
+        groups = self.group_ids(record.get('group') for record in batch)
+        Post.objects.bulk_create(
+            [
+                Post(
+                    id=record['id'],
+                    text=record['text'],
+                    pub_date=record['pub_date'],
+                    author_id=authors[record['author']],
+                    group_id=groups.get(record.get('group')),
+                    image=record.get('image') or '',
+                )
+                for record in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+    def load_comments(self, batch):
+        self.check_ids(Comment, batch, {
+            'post_id': 'post',
+            'author__username': 'author',
+            'created': 'created',
+        })
+        authors = self.user_ids(record['author'] for record in batch)
+        posts = set(Post.objects.filter(
+            pk__in={int(record['post']) for record in batch}
+        ).values_list('pk', flat=True))
+        Comment.objects.bulk_create(
+            [
+                Comment(
+                    id=record['id'],
+                    post_id=int(record['post']),
+                    author_id=authors[record['author']],
+                    text=record['text'],
+                    created=record['created'],
+                )
+                for record in batch if int(record['post']) in posts
+            ],
+            ignore_conflicts=True,
+        )
+
+    def load_follows(self, batch):
+        users = self.user_ids(
+            name for record in batch
+            for name in (record['user'], record['author'])
+        )
+        Follow.objects.bulk_create(
+            [
+                Follow(
+                    user_id=users[record['user']],
+                    author_id=users[record['author']],
+                )
+                for record in batch if record['user'] != record['author']
+            ],
+            ignore_conflicts=True,
+        )
+
+    def rebuild(self):
+        """Пересобирает то, что при обычном сохранении делают сигналы."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment, Follow, User, Group]
+            ):
+                cursor.execute(sql)
+        call_command('reconcile_counters', stdout=self.stdout)
+        author_ids = Follow.objects.order_by().values_list(
+            'author_id', flat=True
+        ).distinct()
+        cache.delete_many([
+            feeds.pull_key(author_id) for author_id in author_ids.iterator()
+        ])
+        call_command('rebuild_timeline', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        images.recount_images()
+        call_command('generate_thumbnails', stdout=self.stdout)
+        caching.bump(
+            caching.FEED,
+            *[caching.author_namespace(name)
+              for name in self.touched['authors']],
+            *[caching.group_namespace(slug)
+              for slug in self.touched['groups']],
+            *[caching.post_namespace(post_id)
+              for post_id in self.touched['posts']],
+        )
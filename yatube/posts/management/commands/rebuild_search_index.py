@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Переиндексирует тексты постов для поиска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько постов переиндексировать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk').only(
+            'pk', 'text', 'pub_date', 'author_id', 'group_id'
+        )
+        batch_size = options['batch_size']
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_posts(batch)
+            last_pk = batch[-1].pk
+            indexed += len(batch)
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feeds
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает входящие ленты подписок по таблице Follow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Пересобрать ленту только этого пользователя.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько пользователей пересобирать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        batch_size = options['batch_size']
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            user_ids = list(
+                users.filter(pk__gt=last_pk).values_list(
+                    'pk', flat=True
+                )[:batch_size]
+            )
+            if not user_ids:
+                break
+            with transaction.atomic():
+                feeds.rebuild(user_ids)
+            last_pk = user_ids[-1]
+            rebuilt += len(user_ids)
+        self.stdout.write(f'Пересобрано лент: {rebuilt}')
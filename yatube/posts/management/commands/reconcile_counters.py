@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import POST_COUNTERS, USER_COUNTERS, recount
+from posts.models import Post, PostStats, User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с таблицами и чинит их.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк сверять в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, stats_model, counters in (
+            (User, UserStats, USER_COUNTERS),
+            (Post, PostStats, POST_COUNTERS),
+        ):
+            fixed = self.reconcile(model, stats_model, counters, batch_size)
+            self.stdout.write(
+                f'{stats_model._meta.object_name}: исправлено {fixed}'
+            )
+
+    def reconcile(self, model, stats_model, counters, batch_size):
+        fixed = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_pk).order_by(
+                    'pk'
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return fixed
+            with transaction.atomic():
+                actual = recount(stats_model, counters, ids)
+                stored = stats_model.objects.select_for_update().in_bulk(ids)
+                missing = [
+                    stats for pk, stats in actual.items() if pk not in stored
+                ]
+                drifted = [
+                    stats for pk, stats in actual.items()
+                    if pk in stored and any(
+                        getattr(stats, name) != getattr(stored[pk], name)
+                        for name in counters
+                    )
+                ]
+                stats_model.objects.bulk_create(missing)
+                stats_model.objects.bulk_update(drifted, list(counters))
+            fixed += len(missing) + len(drifted)
+            last_pk = ids[-1]
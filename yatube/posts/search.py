@@ -0,0 +1,119 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .models import Post, PostTerm
+from .utils import CURSOR_PARAM, POST_PER_PAGE, CursorPaginator
+
+WORD = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+MAX_TERM_WEIGHT = 100
+SEARCH_ORDERING = ('-matched', '-rank', '-pub_date', '-post_id')
+
+
+def tokenize(text):
+    """Слова текста в нормальной форме: нижний регистр, «ё» как «е»."""
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in WORD.findall(text.lower().replace('ё', 'е'))
+        if len(word) > 1
+    ]
+
+
+def query_terms(query):
+    terms = list(dict.fromkeys(tokenize(query)))
+    return terms[:settings.SEARCH_MAX_QUERY_TERMS]
+
+
+def post_terms(post):
+    return [
+        PostTerm(
+            term=term,
+            post=post,
+            author_id=post.author_id,
+            group_id=post.group_id,
+            pub_date=post.pub_date,
+            weight=min(weight, MAX_TERM_WEIGHT),
+        )
+        for term, weight in Counter(tokenize(post.text)).items()
+    ]
+
+
+def index_posts(posts):
+    """Переиндексирует посты: старые слова удаляются, новые вставляются
+    пачками."""
+    posts = list(posts)
+    PostTerm.objects.filter(post__in=posts).delete()
+    PostTerm.objects.bulk_create(
+        [entry for post in posts for entry in post_terms(post)],
+        batch_size=settings.SEARCH_WRITE_BATCH_SIZE,
+    )
+
+
+def matches(terms, group=None, author=None):
+    """Посты, где есть хотя бы одно слово запроса, с оценкой релевантности.
+
+    Выше те, где совпало больше разных слов, затем те, где они
+    встречаются чаще, затем более свежие.
+    """
+    entries = PostTerm.objects.filter(term__in=terms)
+    if group is not None:
+        entries = entries.filter(group=group)
+    if author is not None:
+        entries = entries.filter(author=author)
+    return entries.values('post_id', 'pub_date').annotate(
+        matched=Count('pk'),
+        rank=Sum('weight'),
+    ).order_by(*SEARCH_ORDERING)
+
+
+def matching_posts(terms):
+    """id постов, где есть все слова запроса."""
+    return PostTerm.objects.filter(term__in=terms).values(
+        'post_id'
+    ).annotate(matched=Count('pk')).filter(
+        matched=len(terms)
+    ).values('post_id')
+
+
+class SearchPaginator(CursorPaginator):
+    """Выдача поиска по курсору из (совпало слов, вес, pub_date, id)."""
+
+    def __init__(self, terms, per_page, group=None, author=None):
+        super().__init__(
+            matches(terms, group, author), per_page, SEARCH_ORDERING
+        )
+
+    def key_field(self, name):
+        if name.lstrip('-') in ('matched', 'rank'):
+            return PostTerm._meta.get_field('weight')
+        return PostTerm._meta.get_field(name.lstrip('-'))
+
+    def fetch(self, values, reverse, limit):
+        rows = super().fetch(values, reverse, limit)
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [row['post_id'] for row in rows]
+        )
+        found = []
+        for row in rows:
+            post = posts.get(row['post_id'])
+            if post is not None:
+                post.matched = row['matched']
+                post.rank = row['rank']
+                found.append(post)
+        return found
+
+    def encode(self, direction, number, item):
+        return super().encode(direction, number, {
+            'matched': item.matched,
+            'rank': item.rank,
+            'pub_date': item.pub_date,
+            'post_id': item.pk,
+        })
+
+
+def search_page(request, terms, group=None, author=None):
+    search_paginator = SearchPaginator(terms, POST_PER_PAGE, group, author)
+    return search_paginator.get_page(request.GET.get(CURSOR_PARAM))
@@ -0,0 +1,281 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import caching, counters, feeds, images, search, thumbnails
+from .models import (Comment, Follow, Group, Post, PostStats, User,
+                     UserStats)
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Отключает обработчики этого модуля в текущем потоке.
+
+    Для массовых операций, которые затем сами пересобирают ленты,
+    счётчики, поисковый индекс и сбрасывают кэш.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def suspendable(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if getattr(_state, 'suspended', False):
+            return None
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+@receiver(post_save, sender=Post)
+@suspendable
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        feeds.push_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+@suspendable
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        feeds.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@suspendable
+def index_post(sender, instance, **kwargs):
+    search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Follow)
+@suspendable
+def trim_timeline(sender, instance, **kwargs):
+    feeds.trim(instance.user_id, instance.author_id)
+    feeds.reclassify(instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+@suspendable
+def remember_post_group(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance.previous_group_id, instance.previous_image = (
+        Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image'
+        ).first() or (None, '')
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@suspendable
+def invalidate_post_pages(sender, instance, **kwargs):
+    group_ids = {
+        instance.group_id,
+        getattr(instance, 'previous_group_id', None),
+    }
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True
+    )
+    caching.bump(
+        caching.FEED,
+        caching.author_namespace(instance.author.username),
+        caching.post_namespace(instance.pk),
+        *[caching.group_namespace(slug) for slug in slugs],
+    )
+
+
+@receiver(pre_save, sender=Group)
+@suspendable
+def remember_group_slug(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance.previous_slug = Group.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@suspendable
+def invalidate_group_pages(sender, instance, **kwargs):
+    previous = getattr(instance, 'previous_slug', None)
+    slugs = {instance.slug, previous}
+    namespaces = [caching.group_namespace(slug) for slug in slugs if slug]
+    if previous and previous != instance.slug:
+        # Ссылки на группу из карточек во всех лентах ведут на старый адрес.
+        authors = instance.posts.values_list(
+            'author__username', flat=True
+        ).distinct()
+        namespaces += [
+            caching.FEED,
+            *[caching.author_namespace(username) for username in authors],
+        ]
+    caching.bump(*namespaces)
+
+
+@receiver(pre_delete, sender=Group)
+@suspendable
+def invalidate_group_posts(sender, instance, **kwargs):
+    """Посты удалённой группы теряют ссылку на неё во всех лентах."""
+    authors = instance.posts.values_list(
+        'author__username', flat=True
+    ).distinct()
+    caching.bump(
+        caching.FEED,
+        caching.group_namespace(instance.slug),
+        *[caching.author_namespace(username) for username in authors],
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@suspendable
+def invalidate_comment_post(sender, instance, **kwargs):
+    caching.bump(caching.post_namespace(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@suspendable
+def invalidate_follow_profile(sender, instance, **kwargs):
+    """Профиль автора показывает подписчиков, профиль читателя —
+    подписки."""
+    caching.bump(
+        caching.author_namespace(instance.author.username),
+        caching.author_namespace(instance.user.username),
+    )
+
+
+@receiver(pre_save, sender=User)
+@suspendable
+def remember_user_name(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields and not {'username', 'first_name', 'last_name'} & set(
+        update_fields
+    ):
+        return
+    instance.previous_names = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', 'first_name', 'last_name').first()
+
+
+@receiver(post_save, sender=User)
+@suspendable
+def invalidate_author_cards(sender, instance, **kwargs):
+    """Имя автора выводится в карточках всех лент, где есть его посты,
+    и под его комментариями на страницах постов."""
+    previous = getattr(instance, 'previous_names', None)
+    names = (instance.username, instance.first_name, instance.last_name)
+    if previous is None or previous == names:
+        return
+    slugs = Group.objects.filter(posts__author=instance).values_list(
+        'slug', flat=True
+    ).distinct()
+    if previous[0] != instance.username:
+        cache.delete_many([
+            caching.post_author_key(post_id)
+            for post_id in instance.posts.values_list('pk', flat=True)
+        ])
+    commented = Comment.objects.filter(author=instance).values_list(
+        'post_id', flat=True
+    ).distinct()
+    caching.bump(
+        caching.FEED,
+        caching.user_namespace(instance.pk),
+        caching.author_namespace(instance.username),
+        caching.author_namespace(previous[0]),
+        *[caching.group_namespace(slug) for slug in slugs],
+        *[caching.post_namespace(post_id) for post_id in commented],
+    )
+
+
+@receiver(post_save, sender=Post)
+@suspendable
+def retain_image(sender, instance, created, **kwargs):
+    previous = '' if created else getattr(instance, 'previous_image', '')
+    if instance.image.name == previous:
+        return
+    if instance.image:
+        images.retain(instance.image.name)
+    if previous:
+        images.release(previous)
+
+
+@receiver(post_save, sender=Post)
+@suspendable
+def schedule_thumbnails(sender, instance, created, **kwargs):
+    """Миниатюры строятся для новой картинки, откуда бы ни сохранили
+    пост: из формы, админки или shell."""
+    previous = '' if created else getattr(instance, 'previous_image', '')
+    if instance.image and instance.image.name != previous:
+        thumbnails.schedule(instance)
+
+
+@receiver(post_delete, sender=Post)
+@suspendable
+def release_image(sender, instance, **kwargs):
+    if instance.image:
+        images.release(instance.image.name)
+
+
+@receiver(post_save, sender=User)
+@suspendable
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+@suspendable
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        PostStats.objects.create(post=instance)
+        counters.shift(UserStats, instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+@suspendable
+def uncount_post(sender, instance, **kwargs):
+    counters.shift(UserStats, instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+@suspendable
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.shift(PostStats, instance.post_id, comments_count=1)
+        counters.shift(UserStats, instance.author_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+@suspendable
+def uncount_comment(sender, instance, **kwargs):
+    counters.shift(PostStats, instance.post_id, comments_count=-1)
+    counters.shift(UserStats, instance.author_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+@suspendable
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.shift(UserStats, instance.author_id, followers_count=1)
+        counters.shift(UserStats, instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+@suspendable
+def uncount_follow(sender, instance, **kwargs):
+    counters.shift(UserStats, instance.author_id, followers_count=-1)
+    counters.shift(UserStats, instance.user_id, following_count=-1)
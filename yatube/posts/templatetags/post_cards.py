@@ -0,0 +1,58 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails
+from posts.caching import generations, post_namespace, user_namespace
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, post_generation, author_generation, in_group=False):
+    slug = post.group.slug if post.group_id else ''
+    variant = 'group' if in_group else 'feed'
+    return (
+        f'card:{post.pk}:{post_generation}:{author_generation}:{slug}:'
+        f'{variant}'
+    )
+
+
+@register.simple_tag
+def post_cards(posts, in_group=False):
+    """HTML карточек постов ленты из кэша фрагментов.
+
+    in_group — карточки для страницы группы: текст с переносами строк и
+    без ссылки на ту же группу, как было в шаблоне group_list.
+
+    Поколения и готовые карточки всей страницы читаются двумя
+    обращениями к кэшу; рендерятся только отсутствующие карточки, и
+    миниатюры для них тоже выбираются одним обращением.
+    """
+    posts = list(posts)
+    namespaces = []
+    for post in posts:
+        namespaces.append(post_namespace(post.pk))
+        namespaces.append(user_namespace(post.author_id))
+    versions = generations(namespaces)
+    keys = [
+        card_key(post, *versions[number * 2:number * 2 + 2], in_group)
+        for number, post in enumerate(posts)
+    ]
+    cards = cache.get_many(keys)
+    missing = [
+        (post, key) for post, key in zip(posts, keys) if key not in cards
+    ]
+    thumbnails.prefetch(post for post, key in missing)
+    fresh = {
+        key: render_to_string(
+            CARD_TEMPLATE, {'post': post, 'in_group': in_group}
+        )
+        for post, key in missing
+    }
+    cache.set_many(fresh, settings.CARD_CACHE_TIMEOUT)
+    cards.update(fresh)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,25 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def card_thumbnail(post):
+    """Готовые варианты миниатюры карточки или None, если она ещё
+    строится."""
+    return thumbnails.post_thumbnail(post, thumbnails.CARD)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def card_picture(post):
+    """Разметка <picture> с srcset по ширинам и WebP или заглушка."""
+    return {'picture': card_thumbnail(post)}
+
+
+@register.simple_tag
+def prefetch_thumbnails(posts):
+    """Миниатюры всех постов страницы одним обращением к хранилищу."""
+    thumbnails.prefetch(posts, thumbnails.CARD)
+    return ''
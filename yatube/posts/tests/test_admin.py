@@ -0,0 +1,193 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PostAdminTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'post-admin', 'admin@example.com', 'password'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'admin-group-{number}',
+                description='Описание',
+            )
+            for number in range(3)
+        ]
+        for number in range(250):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.admin,
+                group=cls.groups[number % 3],
+            )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def grow(self):
+        author = User.objects.create_user(username='admin-grow')
+        group = Group.objects.create(
+            title='Ещё группа',
+            slug='admin-grow',
+            description='Описание',
+        )
+        for number in range(20):
+            Post.objects.create(
+                text=f'Новый пост {number}', author=author, group=group
+            )
+
+    def test_changelist_queries_do_not_grow(self):
+        """Авторы, группы и варианты групп не стоят запроса на строку."""
+        self.assertQueryBudget(self.client, self.url, 8)
+        self.assertQueriesDoNotGrow(self.client, self.url, self.grow)
+
+    def test_count_is_cached(self):
+        """Повторная загрузка списка не выполняет COUNT(*)."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql']]
+        )
+
+    def test_next_page_by_key(self):
+        """Следующая страница выбирается по ключу, без OFFSET."""
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url, {'p': 1})
+        posts = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "posts_post"."id"')
+        ]
+        self.assertTrue(posts)
+        self.assertFalse([sql for sql in posts if 'OFFSET' in sql])
+        first_ids = {post.pk for post in first.context['cl'].result_list}
+        second_ids = [post.pk for post in second.context['cl'].result_list]
+        self.assertEqual(len(second_ids), 100)
+        self.assertFalse(first_ids & set(second_ids))
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )[100:200]
+        )
+        self.assertEqual(second_ids, expected)
+
+    def test_new_post_resets_boundaries(self):
+        """После нового поста страницы снова считаются от начала."""
+        self.client.get(self.url)
+        post = Post.objects.create(text='Свежий', author=self.admin)
+        response = self.client.get(self.url, {'p': 1})
+        result = [item.pk for item in response.context['cl'].result_list]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )[100:200]
+        )
+        self.assertEqual(result, expected)
+        self.assertNotIn(post.pk, result)
+
+    def test_search_by_id(self):
+        """Число в поиске находит пост по id."""
+        post = Post.objects.order_by('pk').first()
+        response = self.client.get(self.url, {'q': str(post.pk)})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+
+class RelatedAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'related-admin', 'admin@example.com', 'password'
+        )
+        cls.users = [
+            User.objects.create_user(username=f'reader-{number}')
+            for number in range(30)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.admin)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.users[0], text='Комментарий'
+        )
+        cls.follow = Follow.objects.create(
+            user=cls.users[0], author=cls.admin
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_change_forms_do_not_list_all_users(self):
+        """Формы комментария и подписки не выводят всех пользователей."""
+        urls = (
+            reverse('admin:posts_comment_change', args=[self.comment.pk]),
+            reverse('admin:posts_follow_change', args=[self.follow.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'admin-autocomplete')
+                self.assertNotContains(response, 'reader-29')
+
+    def test_user_autocomplete_by_prefix(self):
+        """Автодополнение ищет пользователей по началу имени."""
+        response = self.client.get(
+            reverse('admin:auth_user_autocomplete'), {'term': 'reader-1'}
+        )
+        names = [item['text'] for item in response.json()['results']]
+        self.assertEqual(
+            sorted(names),
+            sorted(user.username for user in self.users
+                   if user.username.startswith('reader-1')),
+        )
+        response = self.client.get(
+            reverse('admin:auth_user_autocomplete'), {'term': 'eader'}
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    def test_user_changelist_search_unchanged(self):
+        """Список пользователей ищет по почте и без учёта регистра."""
+        User.objects.filter(pk=self.users[3].pk).update(
+            email='mail-3@example.com'
+        )
+        for term in ('MAIL-3', 'READER-3'):
+            with self.subTest(term=term):
+                response = self.client.get(
+                    reverse('admin:auth_user_changelist'), {'q': term}
+                )
+                self.assertContains(response, 'reader-3')
+
+    def test_post_search_unicode_digit(self):
+        """Надстрочная цифра ищется как текст, а не роняет список."""
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': '²'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_changelists_join_relations(self):
+        """Списки комментариев и подписок выбирают связи одним запросом."""
+        for url_name in ('admin:posts_comment_changelist',
+                         'admin:posts_follow_changelist'):
+            with self.subTest(url=url_name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse(url_name))
+                before = len(queries)
+                for user in self.users[1:]:
+                    Comment.objects.create(
+                        post=self.post, author=user, text='Ещё'
+                    )
+                    Follow.objects.get_or_create(user=user, author=self.admin)
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse(url_name))
+                self.assertEqual(len(queries), before)
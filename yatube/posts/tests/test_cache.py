@@ -1,8 +1,15 @@
+import gzip
+from unittest import mock
+
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Post, User
+from posts.caching import (HIT, MISS, REFRESH, STALE, flush_metrics,
+                           metric_key, minify_html, page_cache_metrics,
+                           page_key)
+from posts.models import Follow, Group, Post, User
 
 
 class PostCacheTests(TestCase):
@@ -15,9 +22,22 @@ class PostCacheTests(TestCase):
 
         cls.authorized_client.force_login(cls.user)
         cls.index = 'posts:index'
+        cls.group = Group.objects.create(
+            title='Группа для кэша',
+            slug='cache-group',
+            description='Описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-cache-group',
+            description='Описание',
+        )
+
+    def setUp(self):
+        cache.clear()
 
     def test_cache_index(self):
-        """Проверка хранения и очищения кэша для index."""
+        """Новый пост сразу виден на главной, без очистки кэша."""
         response = self.authorized_client.get(reverse(self.index))
         posts = response.content
 
@@ -25,13 +45,196 @@ class PostCacheTests(TestCase):
             text='test_new_post',
             author=self.user,
         )
-        response_cached = self.authorized_client.get(reverse(self.index))
+        response_new = self.authorized_client.get(reverse(self.index))
+
+        self.assertNotEqual(response_new.content, posts)
+        self.assertIn('test_new_post', response_new.content.decode())
+
+    def test_cache_index_served_without_queries(self):
+        """Пока ничего не менялось, главная отдаётся из кэша без запросов."""
+        Post.objects.create(text='Закэшированный пост', author=self.user)
+        first = self.guest_client.get(reverse(self.index))
+
+        with self.assertNumQueries(0):
+            cached = self.guest_client.get(reverse(self.index))
+        self.assertEqual(cached.content, first.content)
+
+    def test_cache_other_group_not_invalidated(self):
+        """Пост в одной группе не сбрасывает кэш страницы другой группы."""
+        url = reverse('posts:group_list', args=[self.other_group.slug])
+        self.guest_client.get(url)
+
+        Post.objects.create(
+            text='Пост в первой группе',
+            author=self.user,
+            group=self.group,
+        )
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    def test_cache_post_moved_between_groups(self):
+        """Перенос поста в другую группу обновляет страницы обеих групп."""
+        post = Post.objects.create(
+            text='Переезжающий пост',
+            author=self.user,
+            group=self.group,
+        )
+        old_url = reverse('posts:group_list', args=[self.group.slug])
+        new_url = reverse('posts:group_list', args=[self.other_group.slug])
+        self.guest_client.get(old_url)
+        self.guest_client.get(new_url)
+
+        post.group = self.other_group
+        post.save()
+
+        self.assertNotIn(
+            post.text, self.guest_client.get(old_url).content.decode()
+        )
+        self.assertIn(
+            post.text, self.guest_client.get(new_url).content.decode()
+        )
+
+    def test_cache_follower_profile(self):
+        """Подписка обновляет счётчик подписок в профиле читателя."""
+        author = User.objects.create_user(username='cache-author')
+        url = reverse('posts:profile', args=[self.user.username])
+        self.guest_client.get(url)
+
+        Follow.objects.create(user=self.user, author=author)
+
+        self.assertIn(
+            'подписок: 1', self.guest_client.get(url).content.decode()
+        )
+
+    def test_cache_group_renamed(self):
+        """Смена адреса группы обновляет ссылки на неё в лентах."""
+        group = Group.objects.create(
+            title='Переименуемая', slug='old-slug', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=self.user, group=group)
+        urls = (
+            reverse(self.index),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            self.guest_client.get(url)
 
-        old_posts = response_cached.content
-        self.assertEqual(old_posts, posts)
+        group.slug = 'new-slug'
+        group.save()
+
+        for url in urls:
+            with self.subTest(url=url):
+                content = self.guest_client.get(url).content.decode()
+                self.assertIn('/group/new-slug/', content)
+                self.assertNotIn('/group/old-slug/', content)
+
+
+class StaleWhileRevalidateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='swr')
+        cls.url = reverse('posts:index')
+
+    def setUp(self):
+        flush_metrics()
         cache.clear()
-        response_new_cached = self.authorized_client.get(
-            reverse(self.index)
+        self.guest_client = Client()
+        self.guest_client.get(self.url)
+
+    def test_hit_after_miss(self):
+        """Первый запрос рендерит страницу, второй берёт её из кэша."""
+        self.assertEqual(self.guest_client.get(self.url)['X-Cache'], HIT)
+        self.assertEqual(page_cache_metrics()[MISS], 1)
+        self.assertEqual(page_cache_metrics()[HIT], 1)
+
+    def test_metrics_counted_in_memory(self):
+        """Отдача из кэша не пишет метрики в общий кэш на каждый
+        запрос."""
+        with mock.patch.object(cache, 'incr') as incr, \
+                mock.patch.object(cache, 'add') as add:
+            self.guest_client.get(self.url)
+        incr.assert_not_called()
+        add.assert_not_called()
+        self.assertEqual(page_cache_metrics()[HIT], 1)
+
+    @override_settings(PAGE_CACHE_METRICS_INTERVAL=0)
+    def test_metrics_flushed(self):
+        """Накопленные счётчики сбрасываются в общий кэш."""
+        self.guest_client.get(self.url)
+        self.assertEqual(cache.get(metric_key(HIT)), 1)
+        self.assertEqual(page_cache_metrics()[HIT], 1)
+
+    def test_stale_served_while_other_worker_refreshes(self):
+        """Пока другой воркер держит блокировку, отдаётся старая копия."""
+        request = RequestFactory().get(self.url)
+        request.user = AnonymousUser()
+        lock_key = f'{page_key(request)}:lock'
+        cache.add(lock_key, True)
+        self.addCleanup(cache.delete, lock_key)
+        Post.objects.create(text='Пост во время обновления', author=self.user)
+
+        response = self.guest_client.get(self.url)
+
+        self.assertEqual(response['X-Cache'], STALE)
+        self.assertNotIn(
+            'Пост во время обновления', response.content.decode()
+        )
+
+    def test_lock_holder_refreshes(self):
+        """Устаревшую страницу перерисовывает воркер, взявший блокировку."""
+        Post.objects.create(text='Свежий пост', author=self.user)
+
+        response = self.guest_client.get(self.url)
+
+        self.assertEqual(response['X-Cache'], REFRESH)
+        self.assertIn('Свежий пост', response.content.decode())
+        self.assertEqual(self.guest_client.get(self.url)['X-Cache'], HIT)
+
+
+class CompressedPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='compressed')
+        for number in range(5):
+            Post.objects.create(text=f'Сжатый пост {number}', author=user)
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def test_gzip_served_from_cache(self):
+        """Клиенту с gzip отдаётся сжатое тело, и при попадании в кэш оно
+        не сжимается повторно."""
+        plain = Client().get(self.url)
+        with mock.patch('posts.caching.compress_string') as compress:
+            response = Client().get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(response['X-Cache'], HIT)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        for page in (plain, response):
+            self.assertIn('Accept-Encoding', page['Vary'])
+
+    def test_etag_depends_on_encoding(self):
+        """Сжатая и несжатая копии имеют разные ETag."""
+        plain = Client().get(self.url)
+        compressed = Client().get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotEqual(plain['ETag'], compressed['ETag'])
+
+    @override_settings(PAGE_CACHE_MINIFY=True)
+    def test_minified(self):
+        """С PAGE_CACHE_MINIFY страница хранится без лишних пробелов."""
+        response = Client().get(self.url)
+        self.assertNotIn(b'  ', response.content)
+        self.assertContains(response, 'Сжатый пост 4')
+
+    def test_minify_keeps_preformatted(self):
+        """Содержимое pre не меняется."""
+        html = '<div>\n    <p>a   b</p>\n\n</div><pre>  x\n\n  y</pre>'
+        self.assertEqual(
+            minify_html(html), '<div>\n<p>a b</p>\n</div><pre>  x\n\n  y</pre>'
         )
-        new_posts = response_new_cached.content
-        self.assertNotEqual(old_posts, new_posts)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='card-author',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.group = Group.objects.create(
+            title='Группа карточек',
+            slug='cards',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Текст карточки',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def get_index(self):
+        return self.guest_client.get(reverse('posts:index')).content.decode()
+
+    def test_card_reused_across_feeds(self):
+        """Карточка, отрисованная на главной, берётся из кэша в профиле."""
+        self.get_index()
+        with self.assertTemplateNotUsed('posts/includes/post_card.html'):
+            self.guest_client.get(
+                reverse('posts:profile', args=[self.author.username])
+            )
+
+    def test_group_page_card(self):
+        """В группе карточка как прежде: текст с переносами строк и без
+        ссылки на ту же группу."""
+        Post.objects.filter(pk=self.post.pk).update(text='Первая\nВторая')
+        self.get_index()
+        group_url = reverse('posts:group_list', args=[self.group.slug])
+        content = self.guest_client.get(group_url).content.decode()
+        self.assertIn('Первая<br>Вторая', content)
+        self.assertNotIn('все записи группы', content)
+        self.assertIn('все записи группы', self.get_index())
+
+    def test_card_invalidated_on_post_edit(self):
+        """Правка поста через post_edit обновляет его карточку."""
+        self.get_index()
+        self.author_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Исправленный текст', 'group': self.group.pk},
+        )
+        self.assertIn('Исправленный текст', self.get_index())
+
+    def test_card_invalidated_on_author_rename(self):
+        """Смена имени автора обновляет его карточки."""
+        self.assertIn('Лев Толстой', self.get_index())
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        self.assertIn('Алексей Толстой', self.get_index())
@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='etag-author')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='etag-group',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост с ETag',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.user.username]),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_have_validators(self):
+        """Страницы отдают ETag и Last-Modified."""
+        Post.objects.create(text='Изменение', author=self.user)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с If-None-Match получает 304 без запросов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag лент, где он виден."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        Post.objects.create(
+            text='Новый пост',
+            author=self.user,
+            group=self.group,
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_commenter_rename_changes_detail_etag(self):
+        """Смена имени комментатора меняет ETag страницы поста."""
+        commenter = User.objects.create_user(username='commenter')
+        Comment.objects.create(post=self.post, author=commenter, text='Да')
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.guest_client.get(detail)['ETag']
+        commenter.username = 'renamed'
+        commenter.save()
+        response = self.guest_client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'renamed')
+
+    def test_comment_changes_detail_etag(self):
+        """Комментарий меняет ETag страницы поста, но не главной."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        index = reverse('posts:index')
+        detail_etag = self.guest_client.get(detail)['ETag']
+        index_etag = self.guest_client.get(index)['ETag']
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='Комментарий',
+        )
+        response = self.guest_client.get(
+            detail, HTTP_IF_NONE_MATCH=detail_etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Комментарий')
+        response = self.guest_client.get(index, HTTP_IF_NONE_MATCH=index_etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        url = reverse('posts:index')
+        guest_etag = self.guest_client.get(url)['ETag']
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], guest_etag)
@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import user_stats
+from posts.models import Comment, Follow, Post, PostStats, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counter-author')
+        cls.reader = User.objects.create_user(username='counter-reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_counters_follow_writes(self):
+        """Счётчики сдвигаются сигналами постов, комментариев и подписок."""
+        stats = user_stats(self.author)
+        self.assertEqual(stats.posts_count, 1)
+
+        Post.objects.create(text='Ещё пост', author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(user_stats(self.reader).following_count, 1)
+        self.assertEqual(user_stats(self.reader).comments_count, 1)
+
+        follow.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_profile_reads_counters(self):
+        """Профиль и страница поста берут числа из таблицы счётчиков."""
+        response = self.guest_client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.context['posts_count'], 1)
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.context['author_stats'].posts_count, 1)
+        self.assertEqual(response.context['post_stats'].comments_count, 0)
+
+    def test_reconcile_counters_command(self):
+        """reconcile_counters исправляет расхождения и создаёт строки."""
+        user_stats(self.author)
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=42)
+        PostStats.objects.all().delete()
+
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 1
+        )
+        self.assertEqual(
+            PostStats.objects.get(pk=self.post.pk).comments_count, 0
+        )
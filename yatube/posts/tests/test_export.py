@@ -0,0 +1,118 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='exporter')
+        reader = User.objects.create_user(username='analyst')
+        group = Group.objects.create(
+            title='Группа', slug='export', description='Описание'
+        )
+        cls.old = Post.objects.create(text='Старый', author=cls.author)
+        cls.new = Post.objects.create(
+            text='Новый, с "кавычками"', author=cls.author, group=group
+        )
+        cls.watermark = timezone.now() - timedelta(days=1)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=cls.watermark - timedelta(days=1)
+        )
+        Comment.objects.create(post=cls.new, author=reader, text='Да')
+        Follow.objects.create(user=reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def export(self, *args):
+        out = io.StringIO()
+        call_command(
+            'export_yatube', '--output', self.directory, *args, stdout=out
+        )
+        return out.getvalue()
+
+    def read(self, name):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as file:
+            return file.read()
+
+    def test_ndjson(self):
+        """Каждая таблица выгружается в свой файл, строка — объект JSON."""
+        report = self.export()
+        posts = [
+            json.loads(line) for line in self.read('posts.ndjson').splitlines()
+        ]
+        self.assertEqual([post['id'] for post in posts],
+                         [self.old.pk, self.new.pk])
+        self.assertEqual(posts[1]['group'], 'export')
+        self.assertEqual(posts[1]['author'], 'exporter')
+        follows = self.read('follows.ndjson').splitlines()
+        self.assertEqual(json.loads(follows[0])['user'], 'analyst')
+        self.assertIn('строк/с', report)
+        self.assertIn('--since', report)
+
+    def test_csv_gzip_since(self):
+        """Инкрементальная выгрузка в сжатый CSV берёт только новое."""
+        self.export(
+            '--format', 'csv', '--gzip', '--tables', 'posts', 'comments',
+            '--since', self.watermark.isoformat(),
+        )
+        posts = list(csv.DictReader(io.StringIO(self.read('posts.csv.gz'))))
+        self.assertEqual(
+            [post['text'] for post in posts], ['Новый, с "кавычками"']
+        )
+        comments = list(
+            csv.DictReader(io.StringIO(self.read('comments.csv.gz')))
+        )
+        self.assertEqual(comments[0]['post'], str(self.new.pk))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, 'follows.csv.gz'))
+        )
+
+    def test_single_cutoff(self):
+        """Строки новее времени запуска уходят в следующую выгрузку
+        по напечатанной отметке, а не теряются между таблицами."""
+        cutoff = timezone.now()
+        late = Post.objects.create(text='Во время выгрузки',
+                                   author=self.author)
+        Post.objects.filter(pk=late.pk).update(
+            pub_date=cutoff + timedelta(seconds=1)
+        )
+        with mock.patch(
+            'posts.management.commands.export_yatube.timezone.now',
+            return_value=cutoff,
+        ):
+            report = self.export('--tables', 'posts')
+        self.assertNotIn('Во время выгрузки', self.read('posts.ndjson'))
+        self.assertIn(f'--since {cutoff.isoformat()}', report)
+        with mock.patch(
+            'posts.management.commands.export_yatube.timezone.now',
+            return_value=cutoff + timedelta(seconds=2),
+        ):
+            self.export('--tables', 'posts', '--since', cutoff.isoformat())
+        self.assertIn('Во время выгрузки', self.read('posts.ndjson'))
+
+    def test_constant_queries(self):
+        """Выгрузка читает каждую таблицу одним курсором."""
+        with self.assertNumQueries(3):
+            self.export('--chunk-size', '1')
+
+    def test_bad_since(self):
+        """Отметка не в ISO 8601 — ошибка команды."""
+        with self.assertRaises(CommandError):
+            self.export('--since', 'вчера')
@@ -0,0 +1,132 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.feeds import reclassify
+from posts.models import Follow, Post, Timeline, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.author = User.objects.create_user(username='Автор')
+        cls.stranger = User.objects.create_user(username='Незнакомец')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """После подписки в ленте появляются прежние посты автора."""
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author])
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_backfill_capped(self):
+        """При подписке в ленту попадают только последние
+        FEED_BACKFILL_SIZE постов автора."""
+        newer = Post.objects.create(text='Новее', author=self.author)
+        with self.settings(FEED_BACKFILL_SIZE=1):
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [newer])
+
+    def test_new_post_pushed_to_followers(self):
+        """Новый пост раскладывается только подписчикам автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Свежий пост', author=self.author)
+        Post.objects.create(text='Чужой пост', author=self.stranger)
+
+        self.assertEqual(self.feed(), [post, self.old_post])
+        self.assertFalse(
+            Timeline.objects.filter(user=self.stranger).exists()
+        )
+
+    def test_unfollow_trims_timeline(self):
+        """После отписки посты автора пропадают из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author])
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+
+    def test_rebuild_timeline_command(self):
+        """Команда rebuild_timeline восстанавливает потерянные ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Timeline.objects.all().delete()
+
+        call_command('rebuild_timeline', stdout=StringIO())
+
+        self.assertEqual(self.feed(), [self.old_post])
+
+
+@override_settings(FEED_PULL_THRESHOLD=0)
+class HybridTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.star = User.objects.create_user(username='Звезда')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        Follow.objects.create(user=self.reader, author=self.star)
+
+    def test_popular_author_pulled_on_read(self):
+        """Посты автора выше порога не пишутся во входящие,
+        а подмешиваются при чтении."""
+        post = Post.objects.create(text='Пост звезды', author=self.star)
+
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    def test_author_below_threshold_pushed_again(self):
+        """Автор, опустившийся ниже порога, снова раскладывается."""
+        post = Post.objects.create(text='Пост звезды', author=self.star)
+        with self.settings(FEED_PULL_THRESHOLD=10):
+            reclassify(self.star.pk)
+            self.assertTrue(
+                Timeline.objects.filter(user=self.reader, post=post).exists()
+            )
+
+    def test_evicted_class_backfilled(self):
+        """Если класс автора вытеснен из кэша, его посты всё равно
+        возвращаются во входящие, когда он опускается ниже порога."""
+        post = Post.objects.create(text='Пост звезды', author=self.star)
+        fan = User.objects.create_user(username='Поклонник')
+        Follow.objects.create(user=fan, author=self.star)
+        cache.clear()
+        with self.settings(FEED_PULL_THRESHOLD=1):
+            Follow.objects.filter(user=fan).delete()
+            self.assertTrue(
+                Timeline.objects.filter(user=self.reader, post=post).exists()
+            )
+
+    def test_benchmark_feed_command(self):
+        """Бенчмарк печатает обе стратегии и ничего не оставляет в базе."""
+        users_count = User.objects.count()
+        out = StringIO()
+        call_command(
+            'benchmark_feed', followers=4, posts=2, reads=2, stdout=out
+        )
+        self.assertIn('push:', out.getvalue())
+        self.assertIn('hybrid:', out.getvalue())
+        self.assertEqual(User.objects.count(), users_count)
@@ -0,0 +1,131 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+ROTATED_90 = 6
+
+
+def image_file(name, size, image_format, mode='RGB', exif=None):
+    buffer = io.BytesIO()
+    options = {'exif': exif} if exif is not None else {}
+    Image.new(mode, size, color='red').save(buffer, image_format, **options)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), f'image/{image_format.lower()}'
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIDE=400,
+    POST_IMAGE_MAX_PIXELS=4000000,
+    POST_IMAGE_MAX_BYTES=200 * 1024,
+)
+class ImageIngestionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='uploader')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return self.client.post(
+            reverse('posts:create_post'),
+            {'text': 'С картинкой', 'image': image},
+        )
+
+    def test_downscaled_and_stripped(self):
+        """Картинка уменьшается, поворачивается по EXIF и теряет его."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = ROTATED_90
+        self.create(image_file('photo.jpg', (1000, 500), 'JPEG', exif=exif))
+        post = Post.objects.get(author=self.user)
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (200, 400))
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertNotIn(ORIENTATION, stored.getexif())
+
+    def test_png_keeps_alpha(self):
+        """PNG остаётся PNG с прозрачностью."""
+        self.create(image_file('logo.png', (100, 100), 'PNG', mode='RGBA'))
+        post = Post.objects.get(author=self.user)
+        with Image.open(post.image.path) as stored:
+            self.assertEqual((stored.format, stored.mode), ('PNG', 'RGBA'))
+
+    def test_too_many_pixels(self):
+        """Картинка с лишними мегапикселями отклоняется по заголовку."""
+        response = self.create(image_file('huge.png', (3000, 2000), 'PNG'))
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_many_pixels')
+        )
+
+    def test_too_many_bytes(self):
+        """Файл сверх лимита байт отклоняется, не будучи открытым."""
+        upload = SimpleUploadedFile(
+            'big.jpg', b'\xff' * (300 * 1024), 'image/jpeg'
+        )
+        response = self.create(upload)
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_large')
+        )
+
+    def test_admin_too_many_bytes(self):
+        """Админка отклоняет файл сверх лимита, а не хранит обрезанный."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile(
+            'big.jpg', b'\xff' * (300 * 1024), 'image/jpeg'
+        )
+        response = self.client.post(
+            reverse('admin:posts_post_add'),
+            {'text': 'Из админки', 'author': self.user.pk, 'image': upload},
+        )
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertTrue(
+            response.context['adminform'].form.has_error('image', 'too_large')
+        )
+
+    def test_truncated_image(self):
+        """Обрезанная картинка — ошибка формы, а не исключение."""
+        whole = image_file('photo.jpg', (800, 600), 'JPEG')
+        upload = SimpleUploadedFile(
+            'cut.jpg', whole.read()[:2000], 'image/jpeg'
+        )
+        response = self.create(upload)
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertTrue(response.context['form'].errors['image'])
+
+    def test_other_uploads_not_bounded(self):
+        """Загрузки вне форм поста не обрезаются по лимиту картинки."""
+        self.assertNotIn(
+            'posts.images.BoundedUploadHandler',
+            settings.FILE_UPLOAD_HANDLERS,
+        )
+
+    def test_csrf_checked(self):
+        """Проверка CSRF сохраняется и с другими обработчиками
+        загрузки."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:create_post'), {'text': 'Без токена'}
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
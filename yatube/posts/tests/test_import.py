@@ -0,0 +1,182 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import caching, signals
+from posts.models import (Comment, Follow, Group, Post, PostStats, PostTerm,
+                          Timeline, User, UserStats)
+
+
+class ImportCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='importer')
+        cls.reader = User.objects.create_user(username='subscriber')
+        group = Group.objects.create(
+            title='Группа', slug='import', description='Описание'
+        )
+        cls.old = Post.objects.create(text='Старый пост', author=cls.author)
+        cls.new = Post.objects.create(
+            text='Новый пост', author=cls.author, group=group
+        )
+        cls.pub_date = timezone.now() - timedelta(days=3)
+        Post.objects.filter(pk=cls.old.pk).update(pub_date=cls.pub_date)
+        cls.comment = Comment.objects.create(
+            post=cls.new, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def run_command(self, name, *args):
+        out = io.StringIO()
+        call_command(name, *args, stdout=out)
+        return out.getvalue()
+
+    def export_and_clear(self, *args):
+        self.run_command('export_yatube', '--output', self.directory, *args)
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        User.objects.filter(username='subscriber').delete()
+
+    def import_dump(self, *args):
+        return self.run_command('import_yatube', self.directory, *args)
+
+    def test_roundtrip(self):
+        """Выгрузка загружается обратно с прежними id и датами."""
+        self.export_and_clear()
+        report = self.import_dump('--batch-size', '1')
+        old = Post.objects.get(pk=self.old.pk)
+        self.assertEqual(old.pub_date, self.pub_date)
+        self.assertEqual(old.author, self.author)
+        new = Post.objects.get(pk=self.new.pk)
+        self.assertEqual(new.group.slug, 'import')
+        comment = Comment.objects.get(pk=self.comment.pk)
+        self.assertEqual(comment.created, self.comment.created)
+        self.assertEqual(comment.author.username, 'subscriber')
+        self.assertTrue(Follow.objects.filter(
+            user__username='subscriber', author=self.author
+        ).exists())
+        self.assertIn('строк/с', report)
+        self.assertEqual(Post.objects.create(
+            text='После загрузки', author=self.author
+        ).pk, self.new.pk + 1)
+
+    def test_csv_gzip(self):
+        """Сжатый CSV загружается так же, как NDJSON."""
+        self.export_and_clear('--format', 'csv', '--gzip')
+        self.import_dump()
+        self.assertEqual(Post.objects.get(pk=self.old.pk).group, None)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_derived_data_rebuilt(self):
+        """Счётчики, ленты и поисковый индекс пересобираются в конце."""
+        self.export_and_clear()
+        self.import_dump()
+        reader = User.objects.get(username='subscriber')
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 1
+        )
+        self.assertEqual(
+            PostStats.objects.get(post=self.new.pk).comments_count, 1
+        )
+        self.assertEqual(
+            set(Timeline.objects.filter(user=reader).values_list(
+                'post', flat=True
+            )),
+            {self.old.pk, self.new.pk},
+        )
+        self.assertTrue(
+            PostTerm.objects.filter(post=self.old.pk).exists()
+        )
+
+    def test_thumbnails_generated(self):
+        """После загрузки строятся недостающие миниатюры."""
+        self.export_and_clear()
+        with mock.patch(
+            'posts.management.commands.generate_thumbnails.Command.handle',
+            return_value='',
+        ) as generate:
+            self.import_dump()
+        generate.assert_called_once()
+
+    def test_repeated_import_ignores_conflicts(self):
+        """Повторная загрузка не дублирует строки и не падает на
+        уникальности подписки."""
+        self.run_command('export_yatube', '--output', self.directory)
+        self.import_dump()
+        self.import_dump()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_signals_suspended(self):
+        """Во время загрузки кэш сбрасывается один раз, а не на строку."""
+        self.export_and_clear()
+        with mock.patch.object(caching, 'bump') as bump:
+            self.import_dump('--batch-size', '1')
+        bump.assert_called_once()
+        self.assertIn(caching.FEED, bump.call_args[0])
+
+    def test_resume_from_checkpoint(self):
+        """Строки до отметки пропускаются, отметка удаляется в конце."""
+        self.export_and_clear()
+        checkpoint = os.path.join(self.directory, 'import.checkpoint.json')
+        with open(checkpoint, 'w') as file:
+            json.dump({'posts': 1}, file)
+        report = self.import_dump()
+        self.assertFalse(Post.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.new.pk).exists())
+        self.assertIn('пропущено уже загруженных: 1', report)
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_id_clash(self):
+        """Чужой пост с тем же id — ошибка, а не тихий пропуск с
+        привязкой комментариев к чужому посту."""
+        self.export_and_clear()
+        Post.objects.create(
+            id=self.new.pk, text='Местный пост', author=self.author
+        )
+        with self.assertRaises(CommandError):
+            self.import_dump()
+        self.assertFalse(
+            Comment.objects.filter(post=self.new.pk).exists()
+        )
+
+    def test_empty_incremental_export(self):
+        """Пустая инкрементальная выгрузка загружается без ошибок."""
+        since = timezone.now().isoformat()
+        self.run_command(
+            'export_yatube', '--output', self.directory, '--since', since,
+            '--tables', 'posts', 'comments',
+        )
+        report = self.import_dump()
+        self.assertIn('posts: 0 строк', report)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_empty_directory(self):
+        """Без файлов выгрузки — ошибка команды."""
+        with self.assertRaises(CommandError):
+            self.import_dump()
+
+
+class SuspendedSignalsTests(TestCase):
+    def test_handlers_skipped(self):
+        """В suspended() сохранение не трогает счётчики и кэш."""
+        author = User.objects.create_user(username='quiet')
+        with mock.patch.object(caching, 'bump') as bump:
+            with signals.suspended():
+                Post.objects.create(text='Тихо', author=author)
+            bump.assert_not_called()
+            Post.objects.create(text='Громко', author=author)
+            bump.assert_called()
+        self.assertEqual(UserStats.objects.get(user=author).posts_count, 1)
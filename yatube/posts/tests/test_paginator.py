@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.caching import FEED
+from posts.models import Post, User
+from posts.utils import CountedPaginator
+
+
+class CountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='pager')
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_cached_until_write(self):
+        """Число постов берётся из кэша, пока лента не изменилась."""
+        self.assertEqual(
+            CountedPaginator(Post.objects.all(), 2, FEED).count, 3
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CountedPaginator(Post.objects.all(), 2, FEED).count, 3
+            )
+
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertEqual(
+            CountedPaginator(Post.objects.all(), 2, FEED).count, 4
+        )
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=100)
+    def test_huge_feed_uses_estimate(self):
+        """Для огромной ленты точный COUNT(*) не выполняется."""
+        counted = CountedPaginator(
+            Post.objects.all(), 2, FEED, estimate=lambda: 5000
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(counted.num_pages, 2500)
+        self.assertTrue(counted.is_estimate)
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=0)
+    def test_no_last_link_for_estimate(self):
+        """По оценке числа постов ссылка на последнюю страницу не
+        выводится: после удалений она вела бы на пустую страницу."""
+        for number in range(10):
+            Post.objects.create(text=f'Ещё пост {number}', author=self.user)
+        content = self.client.get(
+            reverse('posts:index'), {'page': 1}
+        ).content.decode()
+        self.assertIn('Следующая', content)
+        self.assertNotIn('Последняя', content)
+
+    @override_settings(PAGINATOR_WINDOW=2)
+    def test_page_window(self):
+        """Ссылки выводятся только для окна вокруг текущей страницы."""
+        counted = CountedPaginator(range(1000), 10)
+        counted.get_page(50)
+        self.assertEqual(list(counted.page_window), [48, 49, 50, 51, 52])
+        counted.get_page(1)
+        self.assertEqual(list(counted.page_window), [1, 2, 3])
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PostsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='budget',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост',
+            author=cls.author,
+            group=cls.group,
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.query_budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', args=[cls.group.slug]): 4,
+            reverse('posts:profile', args=[cls.author.username]): 6,
+            # Ещё один запрос — автор поста для ETag при холодном кэше.
+            reverse('posts:post_detail', args=[cls.post.pk]): 7,
+            reverse('posts:follow_index'): 5,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.grown = 0
+
+    def grow(self):
+        """Новые авторы, посты, комментарии и подписки для всех страниц."""
+        for number in range(3):
+            self.grown += 1
+            user = User.objects.create_user(
+                username=f'user-{self.grown}',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            Post.objects.create(text='Пост', author=user, group=self.group)
+            Post.objects.create(text='Пост', author=self.author)
+            Comment.objects.create(post=self.post, author=user, text='Да')
+            Follow.objects.create(user=self.reader, author=user)
+
+    def test_posts_query_budgets(self):
+        """Страницы постов укладываются в бюджет запросов без N+1."""
+        self.check_query_budgets(self.reader_client, self.grow)
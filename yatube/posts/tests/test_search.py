@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User as AdminUser
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, PostTerm, User
+from posts.search import query_terms, tokenize
+
+
+class TokenizeTests(TestCase):
+    def test_tokenize(self):
+        """Слова приводятся к нижнему регистру, «ё» — к «е»."""
+        self.assertEqual(
+            tokenize('Ёжик, ЁЛКА и 2 ежа!'),
+            ['ежик', 'елка', 'ежа'],
+        )
+
+    def test_query_terms_unique(self):
+        """Повторы слов в запросе отбрасываются."""
+        self.assertEqual(query_terms('кот Кот пёс'), ['кот', 'пес'])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='searcher')
+        cls.other = User.objects.create_user(username='other-searcher')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='search-group',
+            description='Описание',
+        )
+        cls.both = Post.objects.create(
+            text='Кот и пёс дружат',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.cat = Post.objects.create(
+            text='Кот кот кот',
+            author=cls.other,
+        )
+        cls.dog = Post.objects.create(
+            text='Пёс гуляет',
+            author=cls.author,
+        )
+        cls.url = reverse('posts:search')
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['page_obj'])
+
+    def test_index_follows_edits(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        dog = Post.objects.get(pk=self.dog.pk)
+        dog.text = 'Собака гуляет'
+        dog.save()
+        self.assertEqual(self.found(q='собака'), [dog])
+        self.assertEqual(self.found(q='гуляет'), [dog])
+        self.assertNotIn(dog, self.found(q='пёс'))
+        dog.delete()
+        self.assertEqual(self.found(q='гуляет'), [])
+
+    def test_ranking(self):
+        """Выше посты, где совпало больше разных слов запроса."""
+        found = self.found(q='кот пёс')
+        self.assertEqual(found[0], self.both)
+        self.assertEqual(set(found), {self.both, self.cat, self.dog})
+
+    def test_filters(self):
+        """Поиск сужается по группе и автору."""
+        self.assertEqual(
+            self.found(q='кот', group=self.group.slug), [self.both]
+        )
+        self.assertEqual(
+            set(self.found(q='пёс', author=self.author.username)),
+            {self.both, self.dog},
+        )
+        self.assertEqual(self.found(q='кот', author=self.other.username),
+                         [self.cat])
+
+    def test_empty_query(self):
+        """Пустой запрос показывает только форму."""
+        response = self.client.get(self.url)
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_cursor_pagination(self):
+        """Выдача листается курсором без повторов и пропусков."""
+        start = timezone.now()
+        posts = [
+            Post.objects.create(text='Листаем выдачу', author=self.author)
+            for _ in range(25)
+        ]
+        for shift, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start - timedelta(minutes=shift % 5)
+            )
+        call_command('rebuild_search_index', batch_size=7, stdout=StringIO())
+        seen = []
+        params = {'q': 'листаем'}
+        while True:
+            response = self.client.get(self.url, params)
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            params['cursor'] = page_obj.paginator.next_cursor
+            self.assertContains(response, 'q=%D0%BB')
+        self.assertEqual(sorted(seen), sorted(post.pk for post in posts))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_rebuild_command(self):
+        """Команда восстанавливает потерянный индекс."""
+        PostTerm.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found(q='гуляет'), [self.dog])
+
+
+class AdminSearchTests(TestCase):
+    def test_admin_uses_index(self):
+        """Поиск в админке находит посты со всеми словами запроса."""
+        admin = AdminUser.objects.create_superuser(
+            'search-admin', 'admin@example.com', 'password'
+        )
+        both = Post.objects.create(text='Кот и пёс', author=admin)
+        Post.objects.create(text='Только кот', author=admin)
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот пёс'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [both]
+        )
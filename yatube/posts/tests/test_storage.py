@@ -0,0 +1,103 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from posts.models import Post, StoredImage, User
+from posts.storage import image_storage, is_hashed
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(color=(10, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color=color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='archivist')
+
+    def create(self, name, content):
+        return Post.objects.create(
+            text=name,
+            author=self.user,
+            image=SimpleUploadedFile(name, content, 'image/jpeg'),
+        )
+
+    def test_duplicates_share_file(self):
+        """Одинаковые картинки хранятся одним файлом с общим счётчиком."""
+        first = self.create('a.jpg', image_bytes())
+        second = self.create('b.JPG', image_bytes())
+        other = self.create('c.jpg', image_bytes((0, 0, 0)))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertTrue(is_hashed(first.image.name))
+        self.assertTrue(first.image.name.endswith('.jpg'))
+        self.assertEqual(
+            StoredImage.objects.get(name=first.image.name).references, 2
+        )
+
+    def test_last_reference_deletes_file(self):
+        """Файл удаляется, когда на него не ссылается ни один пост."""
+        first = self.create('a.jpg', image_bytes())
+        second = self.create('b.jpg', image_bytes())
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(StoredImage.objects.exists())
+
+    def test_replacing_image_releases_previous(self):
+        """Замена картинки освобождает прежний файл."""
+        post = self.create('a.jpg', image_bytes())
+        path = post.image.path
+        post.image = SimpleUploadedFile(
+            'b.jpg', image_bytes((0, 0, 0)), 'image/jpeg'
+        )
+        post.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(
+            list(StoredImage.objects.values_list('name', 'references')),
+            [(post.image.name, 1)],
+        )
+
+    def test_command_migrates_legacy_files(self):
+        """Команда переносит старые файлы под имена по содержимому."""
+        legacy = [
+            super(type(image_storage), image_storage).save(
+                f'posts/legacy{number}.jpg', ContentFile(image_bytes())
+            )
+            for number in range(2)
+        ]
+        posts = [
+            Post.objects.create(text=name, author=self.user, image=name)
+            for name in legacy
+        ]
+        out = io.StringIO()
+        call_command('hash_post_images', '--delete-originals', stdout=out)
+        names = {
+            Post.objects.get(pk=post.pk).image.name for post in posts
+        }
+        self.assertEqual(len(names), 1)
+        name, = names
+        self.assertTrue(is_hashed(name))
+        self.assertTrue(image_storage.exists(name))
+        self.assertFalse(any(image_storage.exists(old) for old in legacy))
+        self.assertEqual(StoredImage.objects.get(name=name).references, 2)
+        self.assertIn('Перенесено файлов: 2', out.getvalue())
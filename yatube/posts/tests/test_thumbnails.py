@@ -0,0 +1,233 @@
+import io
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image, features
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PLACEHOLDER = 'img/placeholder.svg'
+
+
+def uploaded_image(name='photo.jpg', color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), color=color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='photographer')
+        self.post = Post.objects.create(
+            text='Пост с фото',
+            author=self.user,
+            image=uploaded_image(),
+        )
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_placeholder_until_generated(self):
+        """Пока миниатюры нет, страницы показывают заглушку и не строят
+        её сами."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(Client().get(url), PLACEHOLDER)
+        self.assertIsNone(thumbnails.lookup(self.post.image))
+
+    def test_generated_thumbnail_replaces_placeholder(self):
+        """Построенная миниатюра сразу попадает в закэшированные
+        страницы."""
+        for url in self.urls:
+            Client().get(url)
+        thumbnails.generate(self.post.pk)
+        thumbnail = thumbnails.lookup(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertContains(response, thumbnail.url)
+                self.assertNotContains(response, PLACEHOLDER)
+
+    def test_widths(self):
+        """Строятся уменьшенные варианты, и страница выводит их в srcset."""
+        thumbnails.generate(self.post.pk)
+        picture, = thumbnails.lookup_many([self.post.image])
+        small = picture.files[(None, 480)]
+        self.assertEqual((small.width, small.height), (480, 170))
+        response = Client().get(self.urls[0])
+        self.assertContains(response, f'{small.url} 480w')
+        self.assertContains(response, f'{picture.fallback.url} 960w')
+
+    @skipUnless(features.check('webp'), 'Pillow собран без WebP')
+    def test_webp(self):
+        """Строятся WebP-варианты и выводятся в <source>."""
+        thumbnails.generate(self.post.pk)
+        picture, = thumbnails.lookup_many([self.post.image])
+        self.assertEqual(len(picture.files), 4)
+        self.assertEqual(
+            picture.fallback.url, thumbnails.lookup(self.post.image).url
+        )
+        webp = picture.files[('WEBP', 480)]
+        self.assertTrue(webp.name.endswith('.webp'))
+        self.assertEqual((webp.width, webp.height), (480, 170))
+        response = Client().get(self.urls[0])
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, f'{webp.url} 480w')
+
+    def test_base_variant_keeps_sorl_name(self):
+        """Основной вариант называется так же, как {% thumbnail %}."""
+        expected = get_thumbnail(
+            self.post.image, '960x339', crop='center', upscale=True
+        )
+        self.assertEqual(thumbnails.lookup(self.post.image).name,
+                         expected.name)
+
+    def test_image_outside_media_skipped(self):
+        """Имя картинки за пределами MEDIA_ROOT не роняет построение."""
+        Post.objects.filter(pk=self.post.pk).update(image='/tmp/photo.jpg')
+        thumbnails.generate(self.post.pk)
+        self.assertIsNone(thumbnails.lookup(Post.objects.get(
+            pk=self.post.pk
+        ).image))
+
+    def test_command_generates_missing(self):
+        """Команда строит миниатюры для уже загруженных картинок."""
+        out = io.StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIsNotNone(thumbnails.lookup(self.post.image))
+        self.assertIn('1', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BatchedLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='gallery')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Фото {number}',
+                author=cls.user,
+                image=uploaded_image(
+                    f'photo{number}.jpg', (number * 40, 30, 30)
+                ),
+            )
+            for number in range(5)
+        ]
+        Post.objects.create(text='Без фото', author=cls.user)
+        for post in cls.posts[:4]:
+            thumbnails.generate(post.pk)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_many_matches_lookup(self):
+        """Пакетный поиск находит те же миниатюры, что и поштучный."""
+        images = [post.image for post in self.posts] + ['']
+        batched = thumbnails.lookup_many(images)
+        cache.clear()
+        single = [thumbnails.lookup(image) for image in images]
+        self.assertEqual(
+            [picture and picture.fallback.url for picture in batched],
+            [thumbnail and thumbnail.url for thumbnail in single],
+        )
+        self.assertIsNone(batched[4])
+        self.assertIsNone(batched[5])
+
+    def test_page_reads_kvstore_once(self):
+        """Миниатюры страницы читаются из thumbnail_kvstore одним
+        запросом."""
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('posts:index'))
+        kvstore = [
+            query for query in queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore), 1)
+        for post in self.posts[:4]:
+            self.assertContains(
+                response, thumbnails.lookup(post.image).url
+            )
+        self.assertContains(response, PLACEHOLDER, count=1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ScheduleTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_create_post_schedules_thumbnails(self):
+        """Создание поста с картинкой строит миниатюры после коммита."""
+        user = User.objects.create_user(username='uploader')
+        client = Client()
+        client.force_login(user)
+        client.post(
+            reverse('posts:create_post'),
+            {'text': 'С картинкой', 'image': uploaded_image('new.jpg')},
+        )
+        post = Post.objects.get(text='С картинкой')
+        self.assertIsNotNone(thumbnails.lookup(post.image))
+
+    def test_admin_save_schedules_thumbnails(self):
+        """Пост с картинкой из админки тоже получает миниатюры."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('admin:posts_post_add'), {
+            'text': 'Из админки',
+            'author': admin.pk,
+            'image': uploaded_image('admin.jpg'),
+        })
+        post = Post.objects.get(text='Из админки')
+        self.assertIsNotNone(thumbnails.lookup(post.image))
+
+    def test_same_image_generated_once(self):
+        """Посты с одной картинкой ставят в очередь одну задачу."""
+        user = User.objects.create_user(username='twins')
+        posts = [
+            Post.objects.create(
+                text=f'Близнец {number}', author=user, image=uploaded_image()
+            )
+            for number in range(2)
+        ]
+        with mock.patch.object(thumbnails, 'executor') as executor:
+            for post in posts:
+                thumbnails.enqueue(post)
+            thumbnails.run(posts[0].image.name)
+        executor.return_value.submit.assert_called_once_with(
+            thumbnails.run, posts[0].image.name
+        )
+        self.assertIsNotNone(thumbnails.lookup(posts[1].image))
+        self.assertEqual(thumbnails._pending, {})
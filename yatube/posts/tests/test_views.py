@@ -1,3 +1,4 @@
+import base64
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -401,8 +402,56 @@ class PostsPaginatorViewsTests(TestCase):
         )
         self.assertEqual(len(response.context.get('page_obj').object_list), 3)
 
+    def test_posts_cursor_pages(self):
+        """Курсорная навигация: вперёд и назад без пропусков и повторов."""
+        first_page = self.authorized_client.get(
+            reverse(*self.index)
+        ).context['page_obj']
+        self.assertEqual(len(first_page), POST_PER_PAGE)
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+
+        second_page = self.authorized_client.get(
+            reverse(*self.index),
+            {'cursor': first_page.paginator.next_cursor},
+        ).context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertEqual(second_page.number, 2)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            set(first_page) & set(second_page), set()
+        )
+
+        back_page = self.authorized_client.get(
+            reverse(*self.index),
+            {'cursor': second_page.paginator.previous_cursor},
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertEqual(back_page.number, 1)
+        self.assertFalse(back_page.has_previous())
+
+    def test_posts_broken_cursor(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse(*self.index), {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_posts_cursor_bad_value(self):
+        """Курсор правильного вида с негодным ключом тоже открывает
+        первую страницу."""
+        for raw in ('n|2|garbage|5', 'n|2|2020-01-01|abc'):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            with self.subTest(raw=raw):
+                response = self.authorized_client.get(
+                    reverse(*self.index), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.context['page_obj'].number, 1)
+
     def test_cache_index_page(self):
-        """Проверка работы кеша"""
+        """Удалённый пост сразу пропадает из закэшированной главной."""
         post = Post.objects.create(
             text='Пост под кеш',
             author=self.user)
@@ -411,8 +460,5 @@ class PostsPaginatorViewsTests(TestCase):
         post.delete()
         content_delete = self.authorized_client.get(
             reverse('posts:index')).content
-        self.assertEqual(content_add, content_delete)
-        cache.clear()
-        content_cache_clear = self.authorized_client.get(
-            reverse('posts:index')).content
-        self.assertNotEqual(content_add, content_cache_clear)
+        self.assertNotEqual(content_add, content_delete)
+        self.assertNotIn('Пост под кеш', content_delete.decode())
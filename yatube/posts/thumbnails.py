@@ -0,0 +1,303 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection, transaction
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import \
+    KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+CARD = 'card'
+GEOMETRIES = {
+    CARD: ('960x339', {'crop': 'center', 'upscale': True}),
+}
+WIDTHS = {
+    CARD: (480, 960),
+}
+MODERN_FORMATS = {
+    image_format: mime_type
+    for image_format, mime_type in (('WEBP', 'image/webp'),)
+    if features.check(image_format.lower())
+}
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который только ищет готовую миниатюру."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Миниатюра с тем же именем, что построил бы get_thumbnail."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+backend = LookupBackend()
+
+
+class Variant(NamedTuple):
+    image_format: Optional[str]
+    width: int
+    geometry_string: str
+    options: dict
+
+
+def variants(geometry=CARD):
+    """Все варианты миниатюры: ширины из WIDTHS в исходном формате и в
+    MODERN_FORMATS.
+
+    Первый вариант — исходная геометрия без формата в опциях: у него то
+    же имя файла, что и у уже построенных миниатюр.
+    """
+    geometry_string, options = GEOMETRIES[geometry]
+    width, height = map(int, geometry_string.split('x'))
+    widths = sorted(WIDTHS[geometry], key=lambda size: size != width)
+    found = []
+    for image_format in (None, *MODERN_FORMATS):
+        for size in widths:
+            size_options = dict(options)
+            if image_format is not None:
+                size_options['format'] = image_format
+            found.append(Variant(
+                image_format,
+                size,
+                f'{size}x{round(height * size / width)}',
+                size_options,
+            ))
+    return found
+
+
+class Picture:
+    """Готовые варианты миниатюры картинки по (формату, ширине)."""
+
+    def __init__(self, files, base):
+        self.files = files
+        self.fallback = files[base]
+
+    def srcset(self, image_format):
+        return ', '.join(
+            f'{self.files[key].url} {key[1]}w'
+            for key in sorted(self.files, key=lambda key: key[1])
+            if key[0] == image_format
+        )
+
+    @property
+    def fallback_srcset(self):
+        return self.srcset(None)
+
+    @property
+    def sources(self):
+        """(MIME-тип, srcset) для современных форматов, что уже есть."""
+        sources = []
+        for image_format, mime_type in MODERN_FORMATS.items():
+            srcset = self.srcset(image_format)
+            if srcset:
+                sources.append((mime_type, srcset))
+        return sources
+
+
+def thumbnail_file(image, variant):
+    return backend.thumbnail_file(
+        image, variant.geometry_string, **variant.options
+    )
+
+
+def lookup(image, geometry=CARD):
+    """Готовая миниатюра из хранилища sorl или None, без генерации."""
+    if not image:
+        return None
+    return default.kvstore.get(thumbnail_file(image, variants(geometry)[0]))
+
+
+def resolve(files):
+    """Ищет миниатюры в хранилище sorl за один get_many.
+
+    Промахи кэша дочитываются из таблицы thumbnail_kvstore одним
+    запросом и кэшируются так же, как это делает sorl-thumbnail.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        return [kvstore.get(thumbnail) for thumbnail in files]
+    keys = [add_prefix(thumbnail.key) for thumbnail in files]
+    found = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing).values_list(
+                'key', 'value'
+            )
+        )
+        fresh = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fresh, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        found.update(fresh)
+    return [
+        None if found[key] == EMPTY_VALUE else deserialize_image_file(
+            found[key]
+        )
+        for key in keys
+    ]
+
+
+def lookup_many(images, geometry=CARD):
+    """Готовые варианты миниатюр для нескольких картинок сразу.
+
+    Возвращает Picture или None, если основной вариант ещё не построен,
+    в порядке images.
+    """
+    geometry_variants = variants(geometry)
+    wanted = [
+        (number, (variant.image_format, variant.width),
+         thumbnail_file(image, variant))
+        for number, image in enumerate(images) if image
+        for variant in geometry_variants
+    ]
+    resolved = resolve([thumbnail for _, _, thumbnail in wanted])
+    files = [{} for _ in images]
+    for (number, key, _), thumbnail in zip(wanted, resolved):
+        if thumbnail is not None:
+            files[number][key] = thumbnail
+    base = (None, geometry_variants[0].width)
+    return [Picture(found, base) if base in found else None
+            for found in files]
+
+
+def prefetch(posts, geometry=CARD):
+    """Прикрепляет к постам готовые миниатюры в post.thumbnails."""
+    posts = list(posts)
+    resolved = lookup_many([post.image for post in posts], geometry)
+    for post, picture in zip(posts, resolved):
+        if not hasattr(post, 'thumbnails'):
+            post.thumbnails = {}
+        post.thumbnails[geometry] = picture
+    return posts
+
+
+def post_thumbnail(post, geometry=CARD):
+    prefetched = getattr(post, 'thumbnails', {})
+    if geometry not in prefetched:
+        prefetch([post], geometry)
+    return post.thumbnails[geometry]
+
+
+def refresh(posts):
+    """Сбрасывает кэш страниц, где выводятся карточки этих постов."""
+    namespaces = {caching.FEED}
+    for post in posts:
+        namespaces.add(caching.author_namespace(post.author.username))
+        namespaces.add(caching.post_namespace(post.pk))
+        if post.group is not None:
+            namespaces.add(caching.group_namespace(post.group.slug))
+    caching.bump(*namespaces)
+
+
+def generate(post_id):
+    """Строит миниатюры всех геометрий шаблонов для картинки поста.
+
+    После этого карточки и страницы поста перерисовываются уже с
+    миниатюрой вместо заглушки.
+    """
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return
+    try:
+        if not post.image.storage.exists(post.image.name):
+            return
+    except SuspiciousFileOperation:
+        # Имя, сохранённое в обход хранилища, указывает за MEDIA_ROOT.
+        return
+    for geometry in GEOMETRIES:
+        for variant in variants(geometry):
+            get_thumbnail(
+                post.image, variant.geometry_string, **variant.options
+            )
+    refresh([post])
+
+
+def run(name):
+    """Строит миниатюры картинки один раз для всех постов в очереди.
+
+    Посты с одинаковой картинкой делят файл и миниатюры, поэтому
+    повторная постановка в очередь той же картинки только добавляет пост
+    к уже ожидающей задаче.
+    """
+    try:
+        with _lock:
+            post_id = _pending[name][0]
+        generate(post_id)
+        with _lock:
+            post_ids = _pending.pop(name)
+        if len(post_ids) > 1:
+            refresh(Post.objects.select_related('author', 'group').filter(
+                pk__in=post_ids[1:]
+            ))
+    except Exception:
+        with _lock:
+            _pending.pop(name, None)
+        logger.exception('Не удалось построить миниатюры картинки %s', name)
+    finally:
+        connection.close()
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def enqueue(post):
+    name = post.image.name
+    with _lock:
+        if name in _pending:
+            _pending[name].append(post.pk)
+            return
+        _pending[name] = [post.pk]
+    executor().submit(run, name)
+
+
+def schedule(post):
+    """Ставит построение миниатюр в очередь после коммита транзакции.
+
+    При THUMBNAIL_WORKERS = 0 миниатюры строятся сразу после коммита в
+    том же потоке.
+    """
+    if not post.image:
+        return
+    if settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: enqueue(post))
+    else:
+        transaction.on_commit(lambda: generate(post.pk))
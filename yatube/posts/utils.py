@@ -1,10 +1,287 @@
+import base64
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import (EmptyResultSet, FieldDoesNotExist,
+                                    ValidationError)
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import generations
 
 POST_PER_PAGE = 10
+PAGE_PARAM = 'page'
+CURSOR_PARAM = 'cursor'
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Страница выбирается условием на ключ последней (или первой) записи
+    предыдущей страницы, поэтому тысячная страница стоит столько же,
+    сколько первая. Курсоры — непрозрачные токены для ссылок
+    «Следующая»/«Предыдущая».
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=None):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering or self.default_ordering(object_list))
+        self.number = 1
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @staticmethod
+    def default_ordering(object_list):
+        """Ordering модели, дополненный pk для однозначности ключа."""
+        key = object_list.model._meta.ordering[0]
+        tiebreaker = '-pk' if key.startswith('-') else 'pk'
+        return key, tiebreaker
+
+    @property
+    def num_pages(self):
+        return self.number + 1 if self.next_cursor else self.number
+
+    def encode(self, direction, number, item):
+        raw = '|'.join(
+            [direction, str(number)]
+            + [str(self.key_value(item, name)) for name in self.ordering]
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, number, *values = raw.split('|')
+        if direction not in (NEXT, PREVIOUS) or int(number) < 1:
+            raise ValueError(direction, number)
+        if len(values) != len(self.ordering):
+            raise ValueError(values)
+        try:
+            values = [
+                self.key_field(name).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except ValidationError as error:
+            raise ValueError(values) from error
+        return direction, int(number), values
+
+    def key_field(self, name):
+        opts = self.object_list.model._meta
+        name = name.lstrip('-')
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    @staticmethod
+    def key_value(item, name):
+        name = name.lstrip('-')
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
+
+    def seek(self, values, reverse):
+        """Условие «строго после ключа values» в выбранном направлении."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-') != reverse
+            field = name.lstrip('-')
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def after(self, values, reverse):
+        """Записи после ключа values (None — с начала) по порядку ключа."""
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, reverse))
+        return queryset
+
+    def fetch(self, values, reverse, limit):
+        """Первые limit записей после ключа values (None — с начала)."""
+        return list(self.after(values, reverse)[:limit])
+
+    def get_page(self, cursor=None):
+        """Страница по курсору; битый курсор ведёт на первую страницу."""
+        try:
+            direction, number, values = self.decode(cursor)
+        except (AttributeError, TypeError, ValueError, binascii.Error):
+            direction, number, values = NEXT, 1, None
+        reverse = direction == PREVIOUS
+        items = self.fetch(values, reverse, self.per_page + 1)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+
+        if reverse:
+            items.reverse()
+            has_next, has_previous = True, has_more
+            number = max(number, 2) if has_more else 1
+        else:
+            has_next, has_previous = has_more, values is not None
+        self.number = number
+        self.next_cursor = None
+        self.previous_cursor = None
+        if items and has_next:
+            self.next_cursor = self.encode(NEXT, number + 1, items[-1])
+        if items and has_previous:
+            self.previous_cursor = self.encode(
+                PREVIOUS, number - 1, items[0]
+            )
+        return self._get_page(items, number, self)
+
+
+class CountedPaginator(Paginator):
+    """Нумерованный вывод с кэшированным или оценочным числом записей.
+
+    Точный COUNT(*) кэшируется под поколением пространства имён ленты и
+    пересчитывается только после записи в неё. Если дешёвая оценка
+    estimate() больше PAGINATOR_EXACT_COUNT_LIMIT, точный подсчёт не
+    выполняется вовсе. Ссылки выводятся только для окна страниц вокруг
+    текущей.
+    """
+    is_cursor = False
+
+    def __init__(self, object_list, per_page, namespace=None, estimate=None):
+        super().__init__(object_list, per_page)
+        self.namespace = namespace
+        self.estimate = estimate
+        self.is_estimate = False
+        self.number = 1
+
+    @cached_property
+    def count(self):
+        if self.estimate is not None:
+            estimate = self.estimate()
+            if estimate > settings.PAGINATOR_EXACT_COUNT_LIMIT:
+                self.is_estimate = True
+                return estimate
+        if self.namespace is None:
+            return super().count
+        key = self.count_key(*generations([self.namespace]))
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def count_key(self, generation):
+        return f'count:{self.namespace}:{generation}'
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        self.number = page.number
+        return page
+
+    @property
+    def page_window(self):
+        window = settings.PAGINATOR_WINDOW
+        return range(
+            max(self.number - window, 1),
+            min(self.number + window, self.num_pages) + 1,
+        )
+
+
+class AdminPaginator(CountedPaginator):
+    """Страницы списка админки с кэшированным числом строк и переходом
+    к следующей странице по ключу.
+
+    Число строк и ключ последней строки каждой показанной страницы
+    кэшируются под текстом запроса и поколением пространства имён.
+    Если для предыдущей страницы ключ известен, следующая выбирается
+    условием на ключ вместо OFFSET. Оценка estimate() используется
+    только для списка без фильтров.
+    """
+
+    def __init__(self, object_list, per_page, namespace, estimate=None):
+        filtered = bool(object_list.query.where)
+        super().__init__(
+            object_list,
+            per_page,
+            namespace,
+            None if filtered else estimate,
+        )
+        self.keyset = CursorPaginator(object_list, per_page, self.ordering)
+        try:
+            sql = str(object_list.query)
+        except EmptyResultSet:
+            sql = None
+        self.query_hash = sql and hashlib.md5(sql.encode()).hexdigest()
+
+    @cached_property
+    def ordering(self):
+        """Сортировка списка, если по ней можно выбирать по ключу:
+        только собственные поля модели и pk последним."""
+        ordering = tuple(self.object_list.query.order_by)
+        if ordering[-1:] not in (('pk',), ('-pk',)):
+            return None
+        opts = self.object_list.model._meta
+        for name in ordering[:-1]:
+            if not isinstance(name, str):
+                return None
+            try:
+                field = opts.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation:
+                return None
+        return ordering
+
+    @cached_property
+    def generation(self):
+        generation, = generations([self.namespace])
+        return generation
+
+    def count_key(self, generation):
+        return f'count:{self.namespace}:{self.query_hash}:{generation}'
+
+    def boundary_key(self, number):
+        return (f'boundary:{self.namespace}:{self.query_hash}:'
+                f'{self.generation}:{number}')
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.ordering is None or self.query_hash is None:
+            return super().page(number)
+        boundary = None
+        if number > 1:
+            boundary = cache.get(self.boundary_key(number - 1))
+        if boundary is None:
+            page = super().page(number)
+        else:
+            page = self._get_page(
+                self.keyset.after(boundary, False)[:self.per_page],
+                number,
+                self,
+            )
+        items = list(page.object_list)
+        if items:
+            cache.set(
+                self.boundary_key(number),
+                [self.keyset.key_value(items[-1], name)
+                 for name in self.ordering],
+                settings.PAGINATOR_COUNT_TIMEOUT,
+            )
+        return page
 
 
-def paginator(request, post_list):
-    paginator = Paginator(post_list, POST_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+def paginator(request, post_list, ordering=None, namespace=None,
+              estimate=None):
+    if PAGE_PARAM in request.GET:
+        numbered = CountedPaginator(
+            post_list, POST_PER_PAGE, namespace, estimate
+        )
+        return numbered.get_page(request.GET.get(PAGE_PARAM))
+    cursor_paginator = CursorPaginator(post_list, POST_PER_PAGE, ordering)
+    return cursor_paginator.get_page(request.GET.get(CURSOR_PARAM))
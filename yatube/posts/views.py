@@ -1,24 +1,38 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from .caching import (FEED, author_namespace, conditional_page,
+                      detail_namespaces, feed_namespaces, group_namespace,
+                      group_namespaces, page_cache, profile_namespaces)
+from .counters import estimate_posts, post_stats, user_stats
+from .feeds import follow_page
 from .forms import CommentForm, PostForm
+from .images import bounded_uploads
 from .models import Follow, Group, Post, User
+from .search import query_terms, search_page
 from .utils import paginator
 
 
-@cache_page(20, key_prefix='index_page')
+@conditional_page(feed_namespaces)
+@page_cache(feed_namespaces)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginator(request, post_list)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginator(
+        request, post_list, namespace=FEED, estimate=estimate_posts
+    )
     context = {'page_obj': page_obj, }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_namespaces)
+@page_cache(group_namespaces)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator(request, posts)
+    posts = group.posts.select_related('author')
+    page_obj = paginator(request, posts, namespace=group_namespace(slug))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -26,9 +40,11 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_namespaces)
+@page_cache(profile_namespaces)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    posts = author.posts.select_related('group')
 
     if request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -37,27 +53,42 @@ def profile(request, username):
         ).exists()
     else:
         following = False
-    page_obj = paginator(request, posts)
+    stats = user_stats(author)
+    page_obj = paginator(
+        request,
+        posts,
+        namespace=author_namespace(username),
+        estimate=lambda: stats.posts_count,
+    )
     context = {
         'page_obj': page_obj,
         'author': author,
         'following': following,
+        'stats': stats,
+        'posts_count': stats.posts_count,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page(detail_namespaces)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'form': CommentForm(),
         'comments': comments,
+        'author_stats': user_stats(post.author),
+        'post_stats': post_stats(post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@bounded_uploads
 @login_required
+@transaction.atomic
 def create_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
@@ -70,7 +101,9 @@ def create_post(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@bounded_uploads
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -94,6 +127,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -108,16 +142,39 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user).all()
-
-    page_obj = paginator(request=request, post_list=post_list)
+    page_obj = follow_page(request)
     context = {
         'page_obj': page_obj
     }
     return render(request, 'posts/follow.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '')
+    terms = query_terms(query)
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    page_obj = search_page(request, terms, group, author) if terms else None
+    filters = {
+        name: request.GET[name]
+        for name in ('q', 'group', 'author')
+        if request.GET.get(name)
+    }
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'page_obj': page_obj,
+        'query_string': urlencode(filters),
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author == request.user:
@@ -132,6 +189,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = Follow.objects.filter(author=author, user=request.user)
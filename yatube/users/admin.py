@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.models import User
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        """Автодополнение ищет по началу имени пользователя диапазоном по
+        уникальному индексу username, а не LIKE по всей таблице. Поиск в
+        списке пользователей остаётся обычным."""
+        match = request.resolver_match
+        if match is None or not match.url_name.endswith('_autocomplete'):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            username__gte=search_term,
+            username__lt=search_term + '\uffff',
+        ), False
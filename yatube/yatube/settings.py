@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -8,6 +10,8 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 DEBUG = True
 
+TESTING = 'test' in sys.argv or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -27,6 +31,7 @@ INSTALLED_APPS = [
     'users',
     'core',
     'about',
+    'api',
 
     'sorl.thumbnail',
     'debug_toolbar',
@@ -105,6 +110,16 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+
+STATIC_MAX_AGE = 60 * 60
+
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Файлы, которые collectstatic сокращает до селекторов из templates/.
+# Классы, которые собираются не в шаблонах, в подмножество не попадут.
+STATIC_CSS_SUBSET = ()
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
@@ -118,8 +133,81 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MEDIA_MAX_AGE = 60 * 60
+
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+MEDIA_IMMUTABLE_PATTERNS = (
+    r'^cache/',
+    r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$',
+)
+
+# Префикс internal-локации nginx, например '/protected-media/'. Если
+# задан, файлы отдаёт nginx по X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT = None
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TieredCache',
+        # Тесты чистят кэш в setUp и не должны трогать кэш сервера.
+        'LOCATION': os.path.join(
+            tempfile.mkdtemp(prefix='yatube-cache-') if TESTING
+            else os.path.join(BASE_DIR, 'cache'),
+            'cache.sqlite3',
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 200000,
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0.1,
+        },
     }
 }
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+
+PAGE_CACHE_STALE_TIMEOUT = 60 * 10
+
+PAGE_CACHE_JITTER = 0.1
+
+PAGE_CACHE_LOCK_TIMEOUT = 30
+
+PAGE_CACHE_MINIFY = False
+
+PAGE_CACHE_METRICS_INTERVAL = 10
+
+API_PAGE_SIZE = 20
+
+API_MAX_PAGE_SIZE = 100
+
+API_MAX_IDS = 100
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGINATOR_COUNT_TIMEOUT = 60 * 60 * 24
+
+PAGINATOR_EXACT_COUNT_LIMIT = 100000
+
+PAGINATOR_WINDOW = 3
+
+# Сколько последних постов автора попадает в ленту при подписке. Более
+# старые посты в ленте подписок не показываются — они есть в профиле.
+FEED_BACKFILL_SIZE = 1000
+
+FEED_PULL_THRESHOLD = 5000
+
+FEED_WRITE_BATCH_SIZE = 500
+
+SEARCH_MAX_QUERY_TERMS = 8
+
+SEARCH_WRITE_BATCH_SIZE = 500
+
+# Тесты строят миниатюры сразу после коммита: фоновый поток иначе пишет
+# во временный MEDIA_ROOT, пока тест его удаляет.
+THUMBNAIL_WORKERS = 0 if TESTING else 2
+
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 50000000
+
+POST_IMAGE_MAX_SIDE = 2560